@@ -1,35 +1,109 @@
+import hashlib
+from collections import Counter
+from pathlib import Path
+
 import pandas as pd
 import networkx as nx
 import community as community_louvain
 import folium
+from folium.plugins import FastMarkerCluster
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
 from itertools import combinations
 from matplotlib import cm
+from matplotlib.collections import LineCollection
+
+from cache_colunar import DIRETORIO_CACHE, carregar_com_cache
+from instrumentacao import Execucao, etapa, registrar_erro
+from louvain_esparso import best_partition_csr, grafo_para_csr, matriz_adjacencia, modularidade
+from codificacao import (ATRIBUTOS_CATEGORICOS, AUSENTE, ROTULO_AUSENTE, codificar, codigos,
+                         decodificar, matriz_codigos, vocabulario)
 
 # Configurações globais
 TOP_AREAS = ['Central', '77th Street', 'Pacific', 'Southwest', 'Southeast']
+CAMINHOS_PERIODOS = {
+    '2020-2022': '/home/thomas/PycharmProjects/CMAC03/ProjetoParcial - Analise Criminal/Cenário 6 - Análise Criminal/ProjetoFinal/comunidades_2020_2022.csv',
+    '2023-2024': '/home/thomas/PycharmProjects/CMAC03/ProjetoParcial - Analise Criminal/Cenário 6 - Análise Criminal/ProjetoFinal/comunidades_2023_2024.csv'
+}
 RANDOM_SEED = 42
 np.random.seed(RANDOM_SEED)
+BACKEND_COMUNIDADES = 'csr'  # 'csr' (louvain_esparso) ou 'networkx' (python-louvain)
+CONSTRUTOR_SIMILARIDADE = 'exato'  # 'exato' (blocagem) ou 'aproximado' (MinHash/LSH, grau limitado)
+LIMITE_PARES_EXATOS = 5_000_000  # Acima disso o construtor 'exato' passa para o 'aproximado'
+
+# Relatório JSON de cada execução de main() (tempos, memória, contagens e erros por etapa)
+ARQUIVO_RELATORIO = 'relatorio_comunidades.json'
+PERFILAR_ETAPAS = False  # True grava um cProfile (.prof) por etapa em perfis/
+
+# Pesos de similaridade por atributo (tipo de crime e área pesam mais)
+PESOS_SIMILARIDADE = {
+    'Crm Cd Desc': 3,
+    'AREA NAME': 2,
+    'Weapon Desc': 1,
+    'Premis Desc': 1,
+    'Vict Sex': 1,
+    'Vict Descent': 1,
+}
+LIMIAR_SIMILARIDADE = 3
+
+# Blocos de candidatos (posições em PESOS_SIMILARIDADE) além do tipo de crime:
+# área + outro atributo, ou três dos atributos de peso 1
+BLOCOS_SIMILARIDADE = [[1, o] for o in range(2, 6)] + [list(c) for c in combinations(range(2, 6), 3)]
+TAMANHO_LOTE_ARESTAS = 5_000_000  # Pares por lote ao emitir arestas para um destino em disco
+
+# Atributos exibidos no perfil das comunidades
+ATRIBUTOS_PERFIL = {
+    'Tipo de Crime': 'Crm Cd Desc',
+    'Área': 'AREA NAME',
+    'Arma': 'Weapon Desc',
+    'Local': 'Premis Desc',
+    'Vítima (Sexo)': 'Vict Sex',
+    'Vítima (Etnia)': 'Vict Descent',
+}
+
+# Limites de Los Angeles
+LA_LAT_MIN, LA_LAT_MAX = 33.5, 34.5
+LA_LON_MIN, LA_LON_MAX = -118.7, -118.1
+VALORES_AUSENTES = ['missing', 'N/A', '']
+
+# Acima deste número de arestas o mapa agrupa os nós em clusters e desenha apenas os
+# fluxos entre comunidades (o tamanho do HTML passa a depender das comunidades)
+LIMITE_ARESTAS_MAPA = 5000
+
+# Acima deste número de nós plotar_grafo usa o layout por comunidades e amostra as arestas
+LIMITE_NOS_GRAFO = 2000
+MAX_ARESTAS_DESENHO = 20000
+
+# Layouts já calculados, por impressão digital da partição
+_cache_layouts = {}
 
 
 # Funções de pré-processamento
-def convert_coordinate(coord):
-    """Converte coordenadas para     float com tratamento de erros"""
-    if pd.isna(coord) or coord in ['missing', 'N/A']:
-        return None
-    try:
-        coord_str = str(coord).strip()
-        if coord_str.count('.') > 1:
-            parts = coord_str.split('.')
-            coord_str = f"{parts[0]}.{''.join(parts[1:])}"
-        return float(coord_str)
-    except (ValueError, AttributeError):
-        return None
-
-
-def clean_coordinates(df):
-    """Limpa e valida as colunas de coordenadas"""
+def convert_coordinates(serie):
+    """Converte uma coluna de coordenadas para float de forma vetorizada (NaN se inválida)"""
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float)
+
+    texto = serie.astype('string').str.strip()
+    texto = texto.mask(texto.isin(VALORES_AUSENTES))
+
+    # Valores com mais de um ponto ('34.05.23') mantêm apenas o primeiro como decimal
+    varios_pontos = (texto.str.count(r'\.') > 1).fillna(False)
+    if varios_pontos.any():
+        partes = texto[varios_pontos].str.split('.', n=1, expand=True)
+        texto[varios_pontos] = partes[0] + '.' + partes[1].str.replace('.', '', regex=False)
+
+    return pd.to_numeric(texto, errors='coerce').astype(float)
+
+
+def clean_coordinates(df, rejeitados=None):
+    """Limpa e valida as colunas de coordenadas, mantendo apenas pontos dentro de LA
+
+    Se `rejeitados` (Counter) for informado, acumula as linhas descartadas por motivo:
+    'ausente', 'malformada' e 'fora_de_LA'.
+    """
     if not isinstance(df, pd.DataFrame):
         raise ValueError("Input deve ser um DataFrame")
 
@@ -38,11 +112,25 @@ def clean_coordinates(df):
         return df
 
     df = df.copy()
-    df['LAT'] = df['LAT'].apply(convert_coordinate)
-    df['LON'] = df['LON'].apply(convert_coordinate)
-    df = df.dropna(subset=['LAT', 'LON'])
-    valid_coords = (df['LAT'].between(-90, 90) & df['LON'].between(-180, 180))
-    return df[valid_coords].copy()
+    ausente = pd.Series(False, index=df.index)
+    for col in ['LAT', 'LON']:
+        bruto = df[col]
+        if not pd.api.types.is_numeric_dtype(bruto):
+            ausente |= bruto.astype('string').str.strip().isin(VALORES_AUSENTES).fillna(False)
+        ausente |= bruto.isna()
+        df[col] = convert_coordinates(bruto)
+
+    malformada = ~ausente & (df['LAT'].isna() | df['LON'].isna())
+    dentro_la = (df['LAT'].between(LA_LAT_MIN, LA_LAT_MAX) &
+                 df['LON'].between(LA_LON_MIN, LA_LON_MAX))
+    fora_la = ~ausente & ~malformada & ~dentro_la
+
+    if rejeitados is not None:
+        rejeitados['ausente'] += int(ausente.sum())
+        rejeitados['malformada'] += int(malformada.sum())
+        rejeitados['fora_de_LA'] += int(fora_la.sum())
+
+    return df[dentro_la].copy()
 
 
 def preparar_dados(df):
@@ -55,38 +143,76 @@ def preparar_dados(df):
     df = df[cols_relevantes].copy()
 
     for col in df.columns:
-        if df[col].dtype == 'object':
-            df[col] = df[col].fillna('missing').str.strip()
-        elif col != 'DR_NO':
+        if col not in ATRIBUTOS_CATEGORICOS and col != 'DR_NO':
             df[col] = df[col].fillna(0)
 
-    return df
+    # Atributos de texto viram categóricos (código -1 para 'missing')
+    return codificar(df)
+
+
+def tabela_atributos(df):
+    """Atributos dos nós (indexados por DR_NO) com os categóricos substituídos pelos códigos inteiros"""
+    attrs = df.drop(columns='DR_NO')
+    for col in ATRIBUTOS_CATEGORICOS:
+        attrs[col] = codigos(df, col)
+    return attrs.set_axis(df['DR_NO'].to_numpy())
+
+
+def _atributos_nos(df):
+    """Atributos de cada nó como lista de dicionários (formato de G.add_nodes_from)"""
+    return tabela_atributos(df).to_dict('records')
+
+
+def parametros_periodo():
+    """Constantes de filtragem de carregar_periodo, que entram na chave do cache colunar"""
+    return {
+        'areas': TOP_AREAS,
+        'limites_la': [LA_LAT_MIN, LA_LAT_MAX, LA_LON_MIN, LA_LON_MAX],
+        'valores_ausentes': VALORES_AUSENTES,
+        'rotulo_ausente': ROTULO_AUSENTE,
+    }
+
+
+def carregar_periodo(caminho):
+    """Lê, filtra pelas TOP_AREAS e pré-processa o CSV de um período"""
+    with etapa('read_csv') as registro:
+        df = pd.read_csv(caminho, delimiter=';', encoding='utf-8')
+        registro['linhas'] = len(df)
+    with etapa('filtro_areas') as registro:
+        df = df[df['AREA NAME'].isin(TOP_AREAS)].copy()
+        registro['linhas'] = len(df)
+    with etapa('clean_coordinates') as registro:
+        rejeitados = Counter()
+        df = clean_coordinates(df, rejeitados)
+        registro.update(linhas=len(df), descartadas=dict(rejeitados))
+    print(f"Coordenadas descartadas: {dict(rejeitados)}")
+    with etapa('preparar_dados', linhas=len(df)):
+        return preparar_dados(df)
 
 
 # Funções de análise de grafos
 def construir_grafo(df):
     """Constroi grafo de similaridade entre crimes"""
-    G = nx.Graph()
+    G = nx.Graph(vocabulario=vocabulario(df))
 
-    # Adiciona nós com atributos
-    for _, row in df.iterrows():
-        attrs = {col: row[col] for col in df.columns if col != 'DR_NO'}
-        G.add_node(row['DR_NO'], **attrs)
+    # Adiciona nós com atributos codificados
+    for dr_no, attrs in zip(df['DR_NO'], _atributos_nos(df)):
+        G.add_node(dr_no, **attrs)
 
     # Conecta crimes similares
     for (n1, d1), (n2, d2) in combinations(G.nodes(data=True), 2):
         similarity = 0
 
         # Peso maior para tipo de crime e localização
-        if d1['Crm Cd Desc'] == d2['Crm Cd Desc'] and d1['Crm Cd Desc'] != 'missing':
+        if d1['Crm Cd Desc'] == d2['Crm Cd Desc'] and d1['Crm Cd Desc'] != AUSENTE:
             similarity += 3
 
-        if d1['AREA NAME'] == d2['AREA NAME'] and d1['AREA NAME'] != 'missing':
+        if d1['AREA NAME'] == d2['AREA NAME'] and d1['AREA NAME'] != AUSENTE:
             similarity += 2
 
         # Outros atributos
         for attr in ['Weapon Desc', 'Premis Desc', 'Vict Sex', 'Vict Descent']:
-            if d1[attr] == d2[attr] and d1[attr] != 'missing':
+            if d1[attr] == d2[attr] and d1[attr] != AUSENTE:
                 similarity += 1
 
         if similarity >= 3:  # Limiar para considerar conexão
@@ -95,46 +221,388 @@ def construir_grafo(df):
     return G
 
 
+def _pares_por_chave(chave):
+    """Enumera os pares (i, j), i < j, de linhas que compartilham a mesma chave válida (>= 0)"""
+    validos = np.flatnonzero(chave >= 0)
+    ordem = validos[np.argsort(chave[validos], kind='stable')]
+    chaves = chave[ordem]
+
+    # Limites de cada bloco no vetor ordenado
+    inicio = np.r_[0, np.flatnonzero(np.diff(chaves)) + 1]
+    fim = np.r_[inicio[1:], len(chaves)]
+    fim_por_posicao = np.repeat(fim, fim - inicio)
+
+    # Cada posição forma par com todas as posições seguintes do mesmo bloco
+    parceiros = fim_por_posicao - np.arange(len(chaves)) - 1
+    pos_i = np.repeat(np.arange(len(chaves)), parceiros)
+    deslocamento = np.arange(parceiros.sum()) - np.repeat(np.cumsum(parceiros) - parceiros, parceiros)
+    pos_j = pos_i + 1 + deslocamento
+
+    i, j = ordem[pos_i], ordem[pos_j]
+    return np.minimum(i, j), np.maximum(i, j)
+
+
+def _combinar_chaves(codigos, colunas):
+    """Combina colunas de códigos inteiros em uma única chave (-1 se algum valor for ausente)"""
+    chave = np.zeros(len(codigos), dtype=np.int64)
+    validos = np.ones(len(codigos), dtype=bool)
+    for col in colunas:
+        cardinalidade = codigos[:, col].max(initial=-1) + 2
+        chave = chave * cardinalidade + codigos[:, col]
+        validos &= codigos[:, col] >= 0
+    return np.where(validos, chave, -1)
+
+
+def similaridade_pares(codigos, i, j):
+    """Similaridade ponderada dos pares (i, j) a partir da matriz de códigos dos atributos"""
+    pesos = np.array(list(PESOS_SIMILARIDADE.values()))
+    iguais = (codigos[i] == codigos[j]) & (codigos[i] >= 0)
+    return iguais @ pesos
+
+
+def _lotes_de_pares(chave, tamanho_lote):
+    """Mesmos pares de _pares_por_chave, gerados em lotes de aproximadamente `tamanho_lote` pares
+
+    Blocos pequenos são agrupados em lotes; blocos com mais pares que o lote (ex.: um tipo
+    de crime muito frequente) são divididos por faixas de linhas.
+    """
+    validos = np.flatnonzero(chave >= 0)
+    ordem = validos[np.argsort(chave[validos], kind='stable')]
+    chaves = chave[ordem]
+    if not len(ordem):
+        return
+    inicio = np.r_[0, np.flatnonzero(np.diff(chaves)) + 1]
+    tamanho = np.diff(np.r_[inicio, len(chaves)])
+    pares = tamanho * (tamanho - 1) // 2
+    grande = pares > tamanho_lote
+
+    grupo = np.repeat(np.arange(len(inicio)), tamanho)
+    lote_grupo = np.cumsum(np.where(grande, 0, pares)) // tamanho_lote
+    for lote in range(int(lote_grupo.max()) + 1):
+        selecionado = ~grande & (lote_grupo == lote)
+        if pares[selecionado].sum():
+            subchave = np.full(len(chave), -1, dtype=np.int64)
+            no_lote = selecionado[grupo]
+            subchave[ordem[no_lote]] = chaves[no_lote]
+            yield _pares_por_chave(subchave)
+
+    for g in np.flatnonzero(grande):
+        membros = np.sort(ordem[inicio[g]:inicio[g] + tamanho[g]])
+        s = len(membros)
+        passo = max(1, tamanho_lote // s)
+        for a in range(0, s, passo):
+            linhas = np.arange(a, min(a + passo, s))
+            parceiros = s - 1 - linhas
+            pos_i = np.repeat(linhas, parceiros)
+            pos_j = pos_i + 1 + np.arange(parceiros.sum()) - np.repeat(np.cumsum(parceiros) - parceiros, parceiros)
+            yield membros[pos_i], membros[pos_j]
+
+
+def emitir_arestas_similaridade(df, destino, tamanho_lote=TAMANHO_LOTE_ARESTAS):
+    """Emite as arestas de arestas_similaridade em lotes para um destino (ex.: ArestasEmDisco)
+
+    Os índices são posições de linha de `df`. Um par pode sair de mais de um bloco (com o
+    mesmo peso), então o destino deve agregar com 'maximo'. Retorna o destino.
+    """
+    codigos = matriz_codigos(df, list(PESOS_SIMILARIDADE))
+    idx_crime = 0
+
+    for i, j in _lotes_de_pares(codigos[:, idx_crime].astype(np.int64), tamanho_lote):
+        destino.adicionar(i, j, similaridade_pares(codigos, i, j))
+
+    for colunas in BLOCOS_SIMILARIDADE:
+        for i, j in _lotes_de_pares(_combinar_chaves(codigos, colunas), tamanho_lote):
+            mesmo_crime = (codigos[i, idx_crime] == codigos[j, idx_crime]) & (codigos[i, idx_crime] >= 0)
+            similaridade = similaridade_pares(codigos, i, j)
+            manter = ~mesmo_crime & (similaridade >= LIMIAR_SIMILARIDADE)
+            destino.adicionar(i[manter], j[manter], similaridade[manter])
+    return destino
+
+
+def contar_pares_candidatos(df):
+    """Número de pares que arestas_similaridade enumeraria (soma de t*(t-1)/2 sobre os blocos)
+
+    Cresce com o quadrado do tamanho dos blocos; é calculado só com ordenações, sem gerar pares.
+    """
+    codigos = matriz_codigos(df, list(PESOS_SIMILARIDADE))
+    chaves = [codigos[:, 0].astype(np.int64)] + [_combinar_chaves(codigos, c) for c in BLOCOS_SIMILARIDADE]
+    total = 0
+    for chave in chaves:
+        chave = np.sort(chave[chave >= 0])
+        tamanho = np.diff(np.r_[0, np.flatnonzero(np.diff(chave)) + 1, len(chave)])
+        total += int((tamanho * (tamanho - 1) // 2).sum())
+    return total
+
+
+def arestas_similaridade(df):
+    """Arestas (i, j, peso) do grafo de similaridade, por posição de linha, via blocagem
+
+    Uma aresta exige similaridade >= 3, logo os crimes precisam ter o mesmo 'Crm Cd Desc'
+    ou ao menos dois outros atributos iguais. Os pares são gerados apenas dentro desses
+    blocos e os pesos são calculados de forma vetorizada sobre códigos inteiros.
+    """
+    # Códigos inteiros dos atributos; 'missing' (-1) nunca conta como igual
+    codigos = matriz_codigos(df, list(PESOS_SIMILARIDADE))
+    idx_crime = 0
+
+    fontes, destinos, pesos_arestas = [], [], []
+
+    # Mesmo tipo de crime já garante o limiar
+    i, j = _pares_por_chave(codigos[:, idx_crime].astype(np.int64))
+    fontes.append(i)
+    destinos.append(j)
+    pesos_arestas.append(similaridade_pares(codigos, i, j))
+
+    # Demais blocos: descarta pares já cobertos pelo tipo de crime e abaixo do limiar
+    candidatos_i, candidatos_j = [], []
+    for colunas in BLOCOS_SIMILARIDADE:
+        i, j = _pares_por_chave(_combinar_chaves(codigos, colunas))
+        mesmo_crime = (codigos[i, idx_crime] == codigos[j, idx_crime]) & (codigos[i, idx_crime] >= 0)
+        candidatos_i.append(i[~mesmo_crime])
+        candidatos_j.append(j[~mesmo_crime])
+
+    if candidatos_i:
+        par = np.unique(np.concatenate(candidatos_i).astype(np.int64) * len(df) + np.concatenate(candidatos_j))
+        i, j = par // len(df), par % len(df)
+        similaridade = similaridade_pares(codigos, i, j)
+        manter = similaridade >= LIMIAR_SIMILARIDADE
+        fontes.append(i[manter])
+        destinos.append(j[manter])
+        pesos_arestas.append(similaridade[manter])
+
+    return np.concatenate(fontes), np.concatenate(destinos), np.concatenate(pesos_arestas)
+
+
+def grafo_de_arestas(df, i, j, w):
+    """Monta o grafo networkx com os mesmos atributos de nó de construir_grafo"""
+    G = nx.Graph(vocabulario=vocabulario(df))
+    ids = df['DR_NO'].to_numpy()
+    G.add_nodes_from(zip(ids, _atributos_nos(df)))
+    G.add_weighted_edges_from(zip(ids[i].tolist(), ids[j].tolist(), w.tolist()))
+    return G
+
+
+class GrafoCSR:
+    """Grafo de similaridade guardado só como adjacência CSR e tabela de atributos dos nós
+
+    Oferece a parte da interface do networkx usada no pipeline (graph, number_of_nodes,
+    number_of_edges, nodes, edges, is_directed). O nx.Graph completo só é montado, e então
+    guardado, quando pedido por para_networkx (backend python-louvain, desenho de grafos pequenos).
+    """
+
+    def __init__(self, A, nos, atributos, vocab):
+        self.graph = {'vocabulario': vocab, 'csr': (A, list(nos))}
+        self.atributos = atributos
+        self._networkx = None
+
+    def __len__(self):
+        return self.number_of_nodes()
+
+    def __iter__(self):
+        return iter(self.graph['csr'][1])
+
+    def is_directed(self):
+        return False
+
+    def number_of_nodes(self):
+        return len(self.graph['csr'][1])
+
+    def number_of_edges(self):
+        A = self.graph['csr'][0]
+        lacos = np.count_nonzero(A.diagonal())
+        return (A.nnz - lacos) // 2 + lacos
+
+    def nodes(self, data=False):
+        nos = self.graph['csr'][1]
+        return list(zip(nos, self.atributos.to_dict('records'))) if data else list(nos)
+
+    def edges(self, data=False):
+        """Arestas (u, v[, {'weight': peso}]) a partir do triângulo superior da CSR"""
+        A, nos = self.graph['csr']
+        superior = sparse.triu(A, format='coo')
+        pesos = np.where(superior.row == superior.col, superior.data / 2, superior.data)
+        for u, v, w in zip(superior.row.tolist(), superior.col.tolist(), pesos.tolist()):
+            yield (nos[u], nos[v], {'weight': w}) if data else (nos[u], nos[v])
+
+    def estender(self, A, nos, atributos_novos):
+        """Troca a adjacência por uma maior (nós novos no fim) e acrescenta os atributos deles"""
+        self.graph['csr'] = (A, list(nos))
+        self.graph.pop('modularidade', None)
+        self.atributos = pd.concat([self.atributos, atributos_novos])
+        self._networkx = None
+
+    def para_networkx(self):
+        """nx.Graph equivalente (mesmos atributos de nó de grafo_de_arestas), montado uma vez"""
+        if self._networkx is None:
+            G = nx.Graph(vocabulario=self.graph['vocabulario'])
+            G.add_nodes_from(self.nodes(data=True))
+            G.add_edges_from(self.edges(data=True))
+            self._networkx = G
+        return self._networkx
+
+
+def como_networkx(G):
+    """G como nx.Graph (monta o grafo a partir da CSR se G for um GrafoCSR)"""
+    return G.para_networkx() if isinstance(G, GrafoCSR) else G
+
+
+def grafo_csr_de_arestas(df, i, j, w):
+    """GrafoCSR com a adjacência das arestas (i, j, peso) e os atributos dos nós de `df`"""
+    return GrafoCSR(matriz_adjacencia(len(df), i, j, w), df['DR_NO'].tolist(), tabela_atributos(df),
+                    vocabulario(df))
+
+
+def construir_grafo_indexado(df):
+    """Constroi o mesmo grafo de construir_grafo enumerando apenas pares candidatos (blocagem)"""
+    return grafo_de_arestas(df, *arestas_similaridade(df))
+
+
+def detectar_comunidades(df):
+    """Constroi o grafo de similaridade do período e detecta as comunidades com Louvain
+
+    Retorna (GrafoCSR, {DR_NO: comunidade}); o grafo networkx só é montado no backend 'networkx'.
+    O construtor exato gera todos os pares de cada bloco, então períodos com mais de
+    LIMITE_PARES_EXATOS pares candidatos usam o construtor aproximado (grau limitado).
+    """
+    construtor = CONSTRUTOR_SIMILARIDADE
+    if construtor == 'exato':
+        pares = contar_pares_candidatos(df)
+        if pares > LIMITE_PARES_EXATOS:
+            print(f"{pares} pares candidatos (limite {LIMITE_PARES_EXATOS}): usando o construtor aproximado")
+            construtor = 'aproximado'
+
+    with etapa('construir_grafo', construtor=construtor) as registro:
+        if construtor == 'aproximado':
+            from similaridade_aproximada import arestas_similaridade_aproximada
+            i, j, w = arestas_similaridade_aproximada(df)
+        else:
+            i, j, w = arestas_similaridade(df)
+        G = grafo_csr_de_arestas(df, i, j, w)
+        del i, j, w
+        registro.update(nos=G.number_of_nodes(), arestas=G.number_of_edges())
+
+    with etapa('louvain', backend=BACKEND_COMUNIDADES) as registro:
+        if BACKEND_COMUNIDADES == 'csr':
+            partition = best_partition_csr(*G.graph['csr'], random_state=RANDOM_SEED)
+        else:
+            partition = community_louvain.best_partition(G.para_networkx(), weight='weight',
+                                                         random_state=RANDOM_SEED)
+        registro['comunidades'] = len(set(partition.values()))
+    return G, partition
+
+
+def resumo_periodos(grafos, particoes):
+    """Tabela de comparação entre períodos (nós, arestas, densidade e modularidade)"""
+    return pd.DataFrame({
+        'Período': list(grafos.keys()),
+        'Nós': [G.number_of_nodes() for G in grafos.values()],
+        'Arestas': [G.number_of_edges() for G in grafos.values()],
+        'Densidade': [nx.density(G) for G in grafos.values()],
+        'Modularidade': [modularidade(p, grafos[k]) for k, p in particoes.items()]
+    }).set_index('Período')
+
+
+def tabela_nos(G, partition):
+    """Frame com os atributos (códigos) de cada nó e a coluna 'comunidade' da partição"""
+    if isinstance(G, GrafoCSR):
+        nos = G.atributos.copy()
+    else:
+        nos = pd.DataFrame([data for _, data in G.nodes(data=True)], index=list(G.nodes))
+    nos['comunidade'] = [partition[n] for n in nos.index]
+    return nos
+
+
+def perfil_comunidades(G, partition, top=3):
+    """Top valores de cada atributo por comunidade, em uma única agregação agrupada
+
+    Retorna um DataFrame no formato longo com as colunas comunidade, tamanho, atributo,
+    coluna, posicao, valor, contagem e percentual (em relação ao tamanho da comunidade).
+    Com `top=None` mantém todos os valores (distribuição completa de cada atributo).
+    """
+    nos = tabela_nos(G, partition)
+    vocab = G.graph.get('vocabulario', {})
+    tamanho = nos.groupby('comunidade').size()
+
+    longo = nos.melt(id_vars='comunidade', value_vars=list(ATRIBUTOS_PERFIL.values()),
+                     var_name='coluna', value_name='codigo')
+    longo = longo[longo['codigo'] != AUSENTE]
+
+    perfil = longo.groupby(['comunidade', 'coluna', 'codigo']).size().rename('contagem').reset_index()
+    perfil = perfil.sort_values(['comunidade', 'coluna', 'contagem'], ascending=[True, True, False], kind='stable')
+    perfil['posicao'] = perfil.groupby(['comunidade', 'coluna']).cumcount() + 1
+    if top is not None:
+        perfil = perfil[perfil['posicao'] <= top].copy()
+
+    nomes = {col: nome for nome, col in ATRIBUTOS_PERFIL.items()}
+    perfil['atributo'] = perfil['coluna'].map(nomes)
+    perfil['valor'] = [decodificar(vocab, col, cod) for col, cod in zip(perfil['coluna'], perfil['codigo'])]
+    perfil['tamanho'] = perfil['comunidade'].map(tamanho)
+    perfil['percentual'] = perfil['contagem'] / perfil['tamanho']
+
+    colunas = ['comunidade', 'tamanho', 'atributo', 'coluna', 'posicao', 'valor', 'contagem', 'percentual']
+    return perfil[colunas].reset_index(drop=True)
+
+
 def analisar_comunidades(G, partition, periodo):
-    """Analisa padrões nas comunidades detectadas"""
+    """Analisa padrões nas comunidades detectadas e retorna o perfil (ver perfil_comunidades)"""
     print(f"\n=== ANÁLISE DETALHADA - {periodo} ===")
     print(f"Número de comunidades: {len(set(partition.values()))}")
-    print(f"Modularidade: {community_louvain.modularity(partition, G):.3f}")
-
-    for com_id in set(partition.values()):
-        nodes = [n for n in G.nodes if partition[n] == com_id]
-        subgraph = G.subgraph(nodes)
-
-        print(f"\n--- Comunidade {com_id} ({len(nodes)} crimes) ---")
-
-        atributos = {
-            'Tipo de Crime': 'Crm Cd Desc',
-            'Área': 'AREA NAME',
-            'Arma': 'Weapon Desc',
-            'Local': 'Premis Desc',
-            'Vítima (Sexo)': 'Vict Sex',
-            'Vítima (Etnia)': 'Vict Descent',
-        }
-
-        for nome, attr in atributos.items():
-            valores = [data[attr] for _, data in subgraph.nodes(data=True) if data.get(attr, 'missing') != 'missing']
-            if valores:
-                contagem = pd.Series(valores).value_counts().head(3)
+    print(f"Modularidade: {modularidade(partition, G):.3f}")
+
+    perfil = perfil_comunidades(G, partition)
+    tamanhos = pd.Series(partition).value_counts().sort_index()
+    por_comunidade = dict(list(perfil.groupby('comunidade')))
+
+    for com_id, tamanho in tamanhos.items():
+        print(f"\n--- Comunidade {com_id} ({tamanho} crimes) ---")
+        linhas = por_comunidade.get(com_id, perfil.iloc[:0])
+
+        for nome, attr in ATRIBUTOS_PERFIL.items():
+            contagem = linhas[linhas['coluna'] == attr]
+            if len(contagem):
                 print(f"\n🔍 {nome}:")
-                for valor, count in contagem.items():
-                    print(f"  - {valor}: {count} ({count / len(nodes):.1%})")
+                for valor, count, pct in zip(contagem['valor'], contagem['contagem'], contagem['percentual']):
+                    print(f"  - {valor}: {count} ({pct:.1%})")
             else:
                 print(f"\n🔍 {nome}: Sem dados válidos")
 
+    return perfil
+
 
 # Funções de visualização
-def plotar_mapa(G, partition, periodo):
-    """Cria mapa interativo com arestas coloridas por comunidade e legenda de pesos"""
-    # Limites de Los Angeles
-    LA_LAT_MIN, LA_LAT_MAX = 33.5, 34.5
-    LA_LON_MIN, LA_LON_MAX = -118.7, -118.1
+def _cores_comunidades(partition):
+    """{comunidade: cor hexadecimal} na escala rainbow"""
+    communities = sorted(set(partition.values()))
+    colors = cm.rainbow(np.linspace(0, 1, len(communities)))
+    return {c: '#%02x%02x%02x' % (int(r * 255), int(g * 255), int(b * 255))
+            for c, (r, g, b, _) in zip(communities, colors)}
 
-    # Filtra nós válidos dentro de LA
+
+def fluxos_comunidades(G, partition):
+    """Soma dos pesos das arestas entre cada par de comunidades, via P.T @ A @ P
+
+    Retorna (comunidades, matriz CSR c x c); a diagonal guarda o peso interno de cada comunidade.
+    """
+    A, nos = G.graph.get('csr') or grafo_para_csr(G)
+    comunidades, rotulos = np.unique([partition[no] for no in nos], return_inverse=True)
+    P = sparse.csr_matrix((np.ones(len(nos)), (np.arange(len(nos)), rotulos)),
+                          shape=(len(nos), len(comunidades)))
+    fluxos = (P.T @ A @ P).tocsr()
+    return comunidades, (fluxos - sparse.diags(fluxos.diagonal() / 2)).tocsr()
+
+
+def plotar_mapa(G, partition, periodo, agregado=None):
+    """Cria mapa interativo com arestas coloridas por comunidade e legenda de pesos
+
+    Com `agregado` (padrão: grafo com mais de LIMITE_ARESTAS_MAPA arestas) usa plotar_mapa_agregado.
+    """
+    if agregado is None:
+        agregado = G.number_of_edges() > LIMITE_ARESTAS_MAPA
+    if agregado:
+        return plotar_mapa_agregado(G, partition, periodo)
+    G = como_networkx(G)
+
+    # Filtra nós válidos dentro de LA (clean_coordinates já descarta os de fora)
     valid_nodes = [
         (node, data) for node, data in G.nodes(data=True)
         if (data.get('LAT') and data.get('LON') and
@@ -152,12 +620,10 @@ def plotar_mapa(G, partition, periodo):
     mapa = folium.Map(location=[avg_lat, avg_lon], zoom_start=12)
 
     # Cores por comunidade
-    communities = sorted(set(partition.values()))
-    colors = cm.rainbow(np.linspace(0, 1, len(communities)))
-    color_map = {c: '#%02x%02x%02x' % (int(r * 255), int(g * 255), int(b * 255))
-                 for c, (r, g, b, _) in zip(communities, colors)}
+    color_map = _cores_comunidades(partition)
 
     # Adiciona nós
+    vocab = G.graph.get('vocabulario', {})
     node_coords = {}
     for node, data in valid_nodes:
         lat, lon = data['LAT'], data['LON']
@@ -168,8 +634,8 @@ def plotar_mapa(G, partition, periodo):
             radius=5,
             color=color_map[partition[node]],
             fill=True,
-            popup=f"""<b>Crime:</b> {data.get('Crm Cd Desc', 'N/A')}<br>
-                      <b>Área:</b> {data.get('AREA NAME', 'N/A')}<br>
+            popup=f"""<b>Crime:</b> {decodificar(vocab, 'Crm Cd Desc', data.get('Crm Cd Desc'))}<br>
+                      <b>Área:</b> {decodificar(vocab, 'AREA NAME', data.get('AREA NAME'))}<br>
                       <b>Comunidade:</b> {partition[node]}"""
         ).add_to(mapa)
 
@@ -207,8 +673,203 @@ def plotar_mapa(G, partition, periodo):
     mapa.save(f'mapa_crimes_{periodo}.html')
     print(f"Mapa salvo como mapa_crimes_{periodo}.html")
 
-def plotar_grafo(G, partition, title, filename):
-    """Visualização do grafo com comunidades"""
+
+def plotar_mapa_agregado(G, partition, periodo):
+    """Mapa escalável: nós em um único FastMarkerCluster e arestas somadas entre centroides
+
+    Cada comunidade vira um círculo no seu centroide (raio proporcional à raiz do tamanho) e
+    cada par de comunidades conectadas vira uma linha com a soma dos pesos das arestas.
+    """
+    nos = tabela_nos(G, partition)
+    validos = nos['LAT'].between(LA_LAT_MIN, LA_LAT_MAX) & nos['LON'].between(LA_LON_MIN, LA_LON_MAX)
+    nos = nos[validos]
+
+    if nos.empty:
+        print(f"Nenhuma coordenada válida para {periodo} dentro de LA")
+        return
+
+    mapa = folium.Map(location=[nos['LAT'].mean(), nos['LON'].mean()], zoom_start=12)
+    color_map = _cores_comunidades(partition)
+    vocab = G.graph.get('vocabulario', {})
+
+    # Nós: um único vetor [lat, lon, cor, popup] renderizado em clusters no navegador
+    rotulos_crime = [decodificar(vocab, 'Crm Cd Desc', c) for c in nos['Crm Cd Desc']]
+    rotulos_area = [decodificar(vocab, 'AREA NAME', c) for c in nos['AREA NAME']]
+    pontos = [[lat, lon, color_map[com], f"<b>Crime:</b> {crime}<br><b>Área:</b> {area}<br><b>Comunidade:</b> {com}"]
+              for lat, lon, com, crime, area in zip(nos['LAT'], nos['LON'], nos['comunidade'],
+                                                    rotulos_crime, rotulos_area)]
+    callback = """
+    function (row) {
+        var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {radius: 5, color: row[2], fill: true});
+        marker.bindPopup(row[3]);
+        return marker;
+    };
+    """
+    FastMarkerCluster(pontos, callback=callback, name='Crimes').add_to(mapa)
+
+    # Comunidades: centroide, tamanho e peso interno
+    centroides = nos.groupby('comunidade')[['LAT', 'LON']].mean()
+    tamanhos = nos.groupby('comunidade').size()
+    comunidades, fluxos = fluxos_comunidades(G, partition)
+    posicao = {c: k for k, c in enumerate(comunidades)}
+    internos = fluxos.diagonal()
+    entre = sparse.triu(fluxos, k=1, format='coo')
+    maior_fluxo = max(entre.data.max(initial=0), 1)
+
+    # Fluxos entre comunidades (um segmento por par conectado)
+    for a, b, peso in zip(entre.row, entre.col, entre.data):
+        ca, cb = comunidades[a], comunidades[b]
+        if ca in centroides.index and cb in centroides.index:
+            folium.PolyLine(
+                locations=[centroides.loc[ca].tolist(), centroides.loc[cb].tolist()],
+                color='#aaaaaa',
+                weight=1 + 9 * peso / maior_fluxo,
+                opacity=0.6,
+                tooltip=f"Comunidades {ca} ↔ {cb} | Peso total: {peso:g}"
+            ).add_to(mapa)
+
+    for com, (lat, lon) in centroides.iterrows():
+        folium.CircleMarker(
+            location=[lat, lon],
+            radius=4 + np.sqrt(tamanhos[com]),
+            color=color_map[com],
+            fill=True,
+            fill_opacity=0.6,
+            tooltip=f"Comunidade {com} | {tamanhos[com]} crimes | Peso interno: {internos[posicao[com]]:g}"
+        ).add_to(mapa)
+
+    legend_html = '''
+    <div style="position: fixed; 
+                bottom: 50px; left: 50px; width: 200px; height: auto;
+                border:2px solid grey; z-index:9999; font-size:14px;
+                background-color:white; padding:10px;">
+        <b>Legenda</b><br>
+        <i style="background:{}; width:20px; height:20px; 
+                 display:inline-block; vertical-align:middle;"></i> Centroides das comunidades<br>
+        <i style="background:#aaaaaa; width:20px; height:20px; 
+                 display:inline-block; vertical-align:middle;"></i> Fluxo entre comunidades<br>
+        <b>Largura da linha:</b> Soma dos pesos das conexões
+    </div>
+    '''.format(list(color_map.values())[0])
+
+    mapa.get_root().html.add_child(folium.Element(legend_html))
+
+    mapa.save(f'mapa_crimes_{periodo}.html')
+    print(f"Mapa salvo como mapa_crimes_{periodo}.html")
+
+def _impressao_particao(partition):
+    """Hash da partição (nós e comunidades)"""
+    valores = pd.util.hash_pandas_object(pd.Series(partition), index=True).to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
+
+
+def _impressao_grafo(G):
+    """Hash da adjacência CSR (estrutura e pesos) e da ordem dos nós"""
+    A, nos = G.graph.get('csr') or grafo_para_csr(G)
+    impressao = hashlib.sha1(pd.util.hash_pandas_object(pd.Series(nos), index=False).to_numpy().tobytes())
+    for parte in (A.indptr, A.indices, A.data):
+        impressao.update(np.ascontiguousarray(parte).tobytes())
+    return impressao.hexdigest()
+
+
+def _escala_sem_sobreposicao(centros, raio):
+    """Maior fator s tal que os discos (centros, s * raio) não se sobrepõem
+
+    Um par só limita s se a distância for menor que s * (ra + rb) <= s * 2 * max(raio); os
+    vizinhos mais próximos dão um primeiro s e a árvore KD busca só os pares dentro desse alcance.
+    """
+    arvore = cKDTree(centros)
+    distancia, vizinho = arvore.query(centros, k=2)
+    escala = (distancia[:, 1] / (raio + raio[vizinho[:, 1]])).min()
+    pares = arvore.query_pairs(escala * 2 * raio.max(), output_type='ndarray')
+    if len(pares):
+        a, b = pares[:, 0], pares[:, 1]
+        escala = min(escala, (np.linalg.norm(centros[a] - centros[b], axis=1) / (raio[a] + raio[b])).min())
+    return escala
+
+
+def layout_comunidades(G, partition, diretorio=DIRETORIO_CACHE):
+    """Posições (nós x 2, na ordem de `partition`) com layout calculado no grafo quociente
+
+    Cada comunidade vira um supernó posicionado por spring_layout sobre os fluxos entre
+    comunidades; os membros são espalhados em um disco em torno do centroide, com raio
+    proporcional à raiz do tamanho. O resultado é guardado em memória e em
+    `diretorio`/layout-<hash>.npy, com o hash da partição e do grafo (adjacência e pesos),
+    então replotar o mesmo período é imediato e um grafo alterado ganha um layout novo.
+    """
+    chave = hashlib.sha1(f"{_impressao_particao(partition)}-{_impressao_grafo(G)}".encode()).hexdigest()
+    if chave in _cache_layouts:
+        return _cache_layouts[chave]
+    arquivo = Path(diretorio) / f'layout-{chave}.npy'
+    if arquivo.exists():
+        _cache_layouts[chave] = np.load(arquivo)
+        return _cache_layouts[chave]
+
+    comunidades, fluxos = fluxos_comunidades(G, partition)
+    rotulos = np.searchsorted(comunidades, list(partition.values()))
+    tamanhos = np.bincount(rotulos, minlength=len(comunidades))
+
+    # Fluxos normalizados pelo produto dos tamanhos, para as comunidades grandes não colapsarem
+    entre = sparse.triu(fluxos, k=1, format='coo')
+    densidade = entre.data / (tamanhos[entre.row] * tamanhos[entre.col])
+    quociente = nx.Graph()
+    quociente.add_nodes_from(range(len(comunidades)))
+    quociente.add_weighted_edges_from(zip(entre.row.tolist(), entre.col.tolist(), densidade.tolist()))
+    centro = nx.spring_layout(quociente, weight='weight', seed=RANDOM_SEED)
+    centros = np.array([centro[c] for c in range(len(comunidades))])
+
+    # Raio proporcional à raiz do tamanho, na maior escala em que os discos não se sobrepõem
+    raiz = np.sqrt(tamanhos)
+    raio = raiz / raiz.max()
+    if len(comunidades) > 1:
+        raio = raio * 0.9 * _escala_sem_sobreposicao(centros, raio)
+
+    rng = np.random.default_rng(RANDOM_SEED)
+    angulo = rng.uniform(0, 2 * np.pi, len(rotulos))
+    distancia = raio[rotulos] * np.sqrt(rng.uniform(0, 1, len(rotulos)))
+    posicoes = centros[rotulos] + distancia[:, None] * np.column_stack([np.cos(angulo), np.sin(angulo)])
+
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    np.save(arquivo, posicoes)
+    _cache_layouts[chave] = posicoes
+    return posicoes
+
+
+def plotar_grafo_rapido(G, partition, title, filename, max_arestas=MAX_ARESTAS_DESENHO):
+    """Visualização de grafos grandes: layout por comunidades e amostra das arestas rasterizada"""
+    posicoes = layout_comunidades(G, partition)
+    communities = sorted(set(partition.values()))
+    colors = cm.rainbow(np.linspace(0, 1, len(communities)))
+    indice_cor = np.searchsorted(communities, list(partition.values()))
+
+    A, nos = G.graph.get('csr') or grafo_para_csr(G)
+    superior = sparse.triu(A, k=1, format='coo')
+    amostra = np.arange(superior.nnz)
+    if superior.nnz > max_arestas:
+        amostra = np.random.default_rng(RANDOM_SEED).choice(superior.nnz, max_arestas, replace=False)
+    ordem = pd.Index(list(partition)).get_indexer(nos)
+    segmentos = np.stack([posicoes[ordem[superior.row[amostra]]], posicoes[ordem[superior.col[amostra]]]], axis=1)
+
+    fig, ax = plt.subplots(figsize=(15, 12))
+    ax.add_collection(LineCollection(segmentos, colors='gray', alpha=0.05, linewidths=0.5, rasterized=True))
+    ax.scatter(posicoes[:, 0], posicoes[:, 1], c=colors[indice_cor], s=30, alpha=0.8, rasterized=True)
+    ax.set_axis_off()
+    ax.set_title(f"{title} ({min(superior.nnz, max_arestas)} de {superior.nnz} arestas)")
+    fig.savefig(filename, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def plotar_grafo(G, partition, title, filename, rapido=None):
+    """Visualização do grafo com comunidades
+
+    Com `rapido` (padrão: grafo com mais de LIMITE_NOS_GRAFO nós) usa plotar_grafo_rapido.
+    """
+    if rapido is None:
+        rapido = G.number_of_nodes() > LIMITE_NOS_GRAFO
+    if rapido:
+        return plotar_grafo_rapido(G, partition, title, filename)
+
+    G = como_networkx(G)
     plt.figure(figsize=(15, 12))
     pos = nx.spring_layout(G, seed=RANDOM_SEED)
 
@@ -225,57 +886,57 @@ def plotar_grafo(G, partition, title, filename):
 
 # Função principal
 def main():
-    # Carrega e prepara os dados
-    caminhos = {
-        '2020-2022': '/home/thomas/PycharmProjects/CMAC03/ProjetoParcial - Analise Criminal/Cenário 6 - Análise Criminal/ProjetoFinal/comunidades_2020_2022.csv',
-        '2023-2024': '/home/thomas/PycharmProjects/CMAC03/ProjetoParcial - Analise Criminal/Cenário 6 - Análise Criminal/ProjetoFinal/comunidades_2023_2024.csv'
-    }
-
     grafos = {}
     particoes = {}
 
-    for periodo, caminho in caminhos.items():
-        print(f"\n=== PROCESSANDO {periodo} ===")
-
-        try:
-            # Carrega e prepara os dados
-            df = pd.read_csv(caminho, delimiter=';', encoding='utf-8')
-            df = df[df['AREA NAME'].isin(TOP_AREAS)].copy()
-            df = clean_coordinates(df)
-            df = preparar_dados(df)
-
-            # Amostra representativa (aumente conforme recursos disponíveis)
-            sample_size = min(1000, len(df))  # Tamanho da amostra ajustável
-            df_sample = df.sample(sample_size, random_state=RANDOM_SEED)
-
-            # Constroi e analisa o grafo
-            G = construir_grafo(df_sample)
-            partition = community_louvain.best_partition(G, weight='weight', random_state=RANDOM_SEED)
-
-            # Armazena resultados
-            grafos[periodo] = G
-            particoes[periodo] = partition
-
-            # Visualizações e análises
-            plotar_grafo(G, partition, f'Grafo de Crimes - {periodo}', f'grafo_{periodo}.png')
-            plotar_mapa(G, partition, periodo)
-            analisar_comunidades(G, partition, periodo)
-
-        except Exception as e:
-            print(f"Erro ao processar {periodo}: {str(e)}")
-            continue
-
-    # Comparação entre períodos
-    if grafos and particoes:
-        print("\n=== COMPARAÇÃO ENTRE PERÍODOS ===")
-        print(pd.DataFrame({
-            'Período': list(grafos.keys()),
-            'Nós': [G.number_of_nodes() for G in grafos.values()],
-            'Arestas': [G.number_of_edges() for G in grafos.values()],
-            'Densidade': [nx.density(G) for G in grafos.values()],
-            'Modularidade': [community_louvain.modularity(p, grafos[k])
-                             for k, p in particoes.items()]
-        }).set_index('Período'))
+    with Execucao('Comunidades', ARQUIVO_RELATORIO, PERFILAR_ETAPAS):
+        for periodo, caminho in CAMINHOS_PERIODOS.items():
+            print(f"\n=== PROCESSANDO {periodo} ===")
+
+            try:
+                # Carrega e prepara os dados (reaproveita o cache colunar quando atualizado)
+                with etapa('carregar', periodo=periodo) as registro:
+                    df = carregar_com_cache(caminho, carregar_periodo, parametros_periodo())
+                    registro['linhas'] = len(df)
+
+                # Constroi e analisa o grafo com o período completo
+                with etapa('detectar_comunidades', periodo=periodo):
+                    G, partition = detectar_comunidades(df)
+
+                # Armazena resultados
+                grafos[periodo] = G
+                particoes[periodo] = partition
+
+                # Visualizações e análises
+                with etapa('plotar_grafo', periodo=periodo):
+                    plotar_grafo(G, partition, f'Grafo de Crimes - {periodo}', f'grafo_{periodo}.png')
+                with etapa('plotar_mapa', periodo=periodo):
+                    plotar_mapa(G, partition, periodo)
+                with etapa('analisar_comunidades', periodo=periodo) as registro:
+                    perfil = analisar_comunidades(G, partition, periodo)
+                    perfil.to_csv(f'perfil_comunidades_{periodo}.csv', index=False, sep=';', encoding='utf-8')
+                    registro['linhas'] = len(perfil)
+
+            except Exception as e:
+                print(f"Erro ao processar {periodo}: {str(e)}")
+                registrar_erro(e, periodo)
+                continue
+
+        # Comparação entre períodos
+        if grafos and particoes:
+            print("\n=== COMPARAÇÃO ENTRE PERÍODOS ===")
+            with etapa('comparacao_periodos'):
+                print(resumo_periodos(grafos, particoes))
+
+            # Pareamento das comunidades entre períodos consecutivos
+            from comparacao_periodos import acompanhar_periodos
+            with etapa('acompanhamento_comunidades') as registro:
+                eventos = acompanhar_periodos(grafos, particoes)
+                registro['eventos'] = len(eventos)
+            if len(eventos):
+                print("\n=== EVOLUÇÃO DAS COMUNIDADES ===")
+                print(eventos.groupby(['periodo_anterior', 'periodo_novo', 'evento']).size().to_string())
+                eventos.to_csv('evolucao_comunidades.csv', index=False, sep=';', encoding='utf-8')
 
 
 if __name__ == "__main__":
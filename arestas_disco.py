@@ -0,0 +1,207 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+# Destino de arestas em disco para grafos que não cabem na memória. Os construtores emitem
+# lotes (i, j, peso) com índices inteiros de nós; cada lote é particionado por hash do par
+# em baldes (arquivos binários só de acréscimo). Na consolidação cada balde, que cabe na
+# memória, é agregado por ordenação (pares repetidos têm os pesos somados ou o máximo mantido)
+# e o resultado vira uma lista de arestas .npy lida por memory-map. A matriz CSR é montada
+# a partir dela em lotes, sem passar por uma cópia COO completa.
+
+REGISTRO_ARESTA = np.dtype([('i', np.int64), ('j', np.int64), ('w', np.float64)])
+BALDES = 64
+TAMANHO_LOTE = 5_000_000
+_MULTIPLICADOR_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+class ArestasEmDisco:
+    """Lista de arestas em disco: acumula lotes, agrega pesos e gera a visão CSR
+
+    Ao ser criado, descarta baldes deixados no diretório por uma execução anterior.
+    `nao_direcionado=True` normaliza cada par para i <= j. `agregacao` define como pares
+    repetidos são combinados: 'soma' (contagens, transições) ou 'maximo' (pares que podem
+    ser emitidos mais de uma vez com o mesmo peso, como nos blocos de similaridade).
+    """
+
+    def __init__(self, diretorio, nao_direcionado=True, agregacao='soma', baldes=BALDES):
+        if agregacao not in ('soma', 'maximo'):
+            raise ValueError("agregacao deve ser 'soma' ou 'maximo'")
+        self.diretorio = Path(diretorio)
+        self.nao_direcionado = nao_direcionado
+        self.agregacao = agregacao
+        self.baldes = baldes
+        self.caminho = self.diretorio / 'arestas.npy'
+        self.n = 0
+        self._arquivos = {}
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        # Baldes de uma execução anterior no mesmo diretório seriam somados às arestas novas
+        for antigo in [*self.diretorio.glob('balde-*.bin'), *self.diretorio.glob('agregado-*.bin')]:
+            antigo.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self._fechar()
+        return False
+
+    def _balde(self, k):
+        return self.diretorio / f'balde-{k:03d}.bin'
+
+    def _fechar(self):
+        for arquivo in self._arquivos.values():
+            arquivo.close()
+        self._arquivos = {}
+
+    def adicionar(self, i, j, w):
+        """Acrescenta um lote de arestas (arrays de mesmo tamanho) aos baldes"""
+        i, j = np.asarray(i, dtype=np.int64), np.asarray(j, dtype=np.int64)
+        w = np.broadcast_to(np.asarray(w, dtype=np.float64), i.shape)
+        if not len(i):
+            return
+        if self.nao_direcionado:
+            i, j = np.minimum(i, j), np.maximum(i, j)
+        self.n = max(self.n, int(i.max()) + 1, int(j.max()) + 1)
+
+        with np.errstate(over='ignore'):
+            balde = ((i.astype(np.uint64) * _MULTIPLICADOR_HASH) ^ j.astype(np.uint64)) % np.uint64(self.baldes)
+        ordem = np.argsort(balde, kind='stable')
+        registros = np.empty(len(i), dtype=REGISTRO_ARESTA)
+        registros['i'], registros['j'], registros['w'] = i[ordem], j[ordem], w[ordem]
+        limites = np.searchsorted(balde[ordem], np.arange(self.baldes + 1, dtype=np.uint64))
+
+        for k in np.flatnonzero(np.diff(limites)).tolist():
+            parte = registros[limites[k]:limites[k + 1]]
+            if k not in self._arquivos:
+                self._arquivos[k] = open(self._balde(k), 'ab')
+            self._arquivos[k].write(parte.tobytes())
+
+    def consolidar(self):
+        """Agrega os baldes e grava a lista final de arestas; retorna o caminho do .npy"""
+        self._fechar()
+        agregados, total = [], 0
+        for k in range(self.baldes):
+            origem = self._balde(k)
+            if not origem.exists():
+                continue
+            registros = np.fromfile(origem, dtype=REGISTRO_ARESTA)
+            origem.unlink()
+            ordem = np.lexsort((registros['j'], registros['i']))
+            registros = registros[ordem]
+            novo = np.ones(len(registros), dtype=bool)
+            novo[1:] = (registros['i'][1:] != registros['i'][:-1]) | (registros['j'][1:] != registros['j'][:-1])
+            inicio = np.flatnonzero(novo)
+            reduzir = np.add if self.agregacao == 'soma' else np.maximum
+            unicos = registros[inicio]
+            unicos['w'] = reduzir.reduceat(registros['w'], inicio)
+
+            destino = self.diretorio / f'agregado-{k:03d}.bin'
+            unicos.tofile(destino)
+            agregados.append((destino, len(unicos)))
+            total += len(unicos)
+
+        arestas = np.lib.format.open_memmap(self.caminho, mode='w+', dtype=REGISTRO_ARESTA, shape=(total,))
+        posicao = 0
+        for destino, quantidade in agregados:
+            arestas[posicao:posicao + quantidade] = np.fromfile(destino, dtype=REGISTRO_ARESTA)
+            posicao += quantidade
+            destino.unlink()
+        arestas.flush()
+        del arestas
+        return self.caminho
+
+    def arestas(self):
+        """Lista consolidada (i, j, w) como array estruturado em memory-map"""
+        return ler_arestas(self.caminho)
+
+    def csr(self, n=None, tamanho_lote=TAMANHO_LOTE):
+        """Visão CSR da lista consolidada (ver csr_de_arestas)"""
+        return csr_de_arestas(self.arestas(), n or self.n, self.nao_direcionado, tamanho_lote)
+
+    def estatisticas(self, n=None, tamanho_lote=TAMANHO_LOTE):
+        """Nós, arestas, soma/mínimo/máximo dos pesos e graus, calculados em lotes"""
+        return estatisticas_arestas(self.arestas(), n or self.n, tamanho_lote)
+
+    def remover(self):
+        """Apaga o diretório do destino"""
+        self._fechar()
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+
+
+def ler_arestas(caminho):
+    """Abre uma lista de arestas consolidada em memory-map (somente leitura)"""
+    return np.load(caminho, mmap_mode='r')
+
+
+def _lotes(arestas, tamanho_lote):
+    for inicio in range(0, len(arestas), tamanho_lote):
+        lote = np.asarray(arestas[inicio:inicio + tamanho_lote])
+        yield lote['i'], lote['j'], lote['w']
+
+
+def _entradas(i, j, w, nao_direcionado):
+    """Entradas (linha, coluna, valor) da matriz; não direcionado segue a convenção do louvain_esparso"""
+    if not nao_direcionado:
+        return i, j, w
+    fora = i != j
+    return (np.concatenate([i, j[fora]]), np.concatenate([j, i[fora]]),
+            np.concatenate([np.where(fora, w, 2 * w), w[fora]]))
+
+
+def csr_de_arestas(arestas, n, nao_direcionado=True, tamanho_lote=TAMANHO_LOTE):
+    """Monta a matriz CSR n x n em duas passadas pela lista de arestas (sem cópia COO)
+
+    Não direcionado: matriz simétrica com o dobro do peso dos laços na diagonal, a mesma
+    convenção de louvain_esparso.matriz_adjacencia. Direcionado: uma entrada i → j por aresta.
+    As arestas devem estar agregadas (sem pares repetidos).
+    """
+    # Passada 1: número de entradas por linha
+    por_linha = np.zeros(n, dtype=np.int64)
+    for i, j, w in _lotes(arestas, tamanho_lote):
+        linhas, _, _ = _entradas(i, j, w, nao_direcionado)
+        por_linha += np.bincount(linhas, minlength=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(por_linha, out=indptr[1:])
+
+    # Passada 2: cada entrada vai para a próxima posição livre da sua linha
+    tipo_indice = np.int32 if n < np.iinfo(np.int32).max else np.int64
+    indices = np.empty(indptr[-1], dtype=tipo_indice)
+    dados = np.empty(indptr[-1], dtype=np.float64)
+    proxima = indptr[:-1].copy()
+    for i, j, w in _lotes(arestas, tamanho_lote):
+        linhas, colunas, valores = _entradas(i, j, w, nao_direcionado)
+        ordem = np.argsort(linhas, kind='stable')
+        linhas = linhas[ordem]
+        posto = np.arange(len(linhas)) - np.searchsorted(linhas, linhas, side='left')
+        posicao = proxima[linhas] + posto
+        indices[posicao] = colunas[ordem]
+        dados[posicao] = valores[ordem]
+        proxima += np.bincount(linhas, minlength=n)
+
+    A = sparse.csr_matrix((dados, indices, indptr), shape=(n, n))
+    A.sort_indices()
+    return A
+
+
+def estatisticas_arestas(arestas, n, tamanho_lote=TAMANHO_LOTE):
+    """Estatísticas da lista de arestas sem carregá-la inteira na memória"""
+    grau = np.zeros(n, dtype=np.int64)
+    soma, minimo, maximo = 0.0, np.inf, -np.inf
+    for i, j, w in _lotes(arestas, tamanho_lote):
+        grau += np.bincount(i, minlength=n) + np.bincount(j, minlength=n)
+        soma += float(w.sum())
+        minimo, maximo = min(minimo, float(w.min())), max(maximo, float(w.max()))
+    m = len(arestas)
+    return {
+        'nos': n,
+        'arestas': m,
+        'peso_total': soma,
+        'peso_minimo': minimo if m else None,
+        'peso_maximo': maximo if m else None,
+        'grau_medio': float(grau.mean()) if n else 0.0,
+        'grau_maximo': int(grau.max(initial=0)),
+        'densidade': 2 * m / (n * (n - 1)) if n > 1 else 0.0,
+    }
@@ -0,0 +1,290 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from datetime import timedelta
+
+import community as community_louvain
+import numpy as np
+import pandas as pd
+
+import Comunidades
+import subgrafos
+from codificacao import codificar
+from louvain_esparso import best_partition_csr, grafo_para_csr, matriz_adjacencia, modularidade_csr
+from rotas import ServicoRotas
+from similaridade_aproximada import arestas_similaridade_aproximada
+
+# Benchmark das etapas críticas (grafo de similaridade, Louvain, subgrafos A e B e rota) com
+# dados sintéticos no formato do LAPD, em tamanhos crescentes. Também confere que as versões
+# otimizadas produzem os mesmos grafos que as implementações de referência.
+
+TAMANHOS = [1_000, 10_000, 100_000, 1_000_000]
+TAMANHO_VERIFICACAO = 1_000
+TOLERANCIA_MODULARIDADE = 0.01
+
+# Maior número de linhas em que cada etapa é executada (None = sem limite); acima disso
+# a etapa é marcada como pulada. As etapas exatas crescem com o quadrado dos blocos.
+LIMITES_ETAPAS = {
+    'similaridade_exata': 10_000,
+    'similaridade_aproximada': None,
+    'louvain_csr': 100_000,
+    'subgrafo_a': None,
+    'subgrafo_b': 200_000,
+    'rota': 200_000,
+}
+
+# Tipos de crime mais frequentes do LAPD (proporções aproximadas); o restante da massa vai
+# para uma cauda com distribuição de Zipf
+CRIMES_FREQUENTES = {
+    'VEHICLE - STOLEN': 0.11, 'BATTERY - SIMPLE ASSAULT': 0.075, 'BURGLARY FROM VEHICLE': 0.06,
+    'THEFT OF IDENTITY': 0.06, 'VANDALISM - FELONY ($400 & OVER, ALL CHURCH VANDALISMS)': 0.06,
+    'BURGLARY': 0.058, 'ASSAULT WITH DEADLY WEAPON, AGGRAVATED ASSAULT': 0.05,
+    'INTIMATE PARTNER - SIMPLE ASSAULT': 0.046, 'THEFT PLAIN - PETTY ($950 & UNDER)': 0.045,
+    'THEFT FROM MOTOR VEHICLE - PETTY ($950 & UNDER)': 0.04, 'ROBBERY': 0.035,
+    'SHOPLIFTING - PETTY THEFT ($950 & UNDER)': 0.03,
+}
+CRIMES_CAUDA = 100
+ARMAS = {'missing': 0.65, 'STRONG-ARM (HANDS, FIST, FEET OR BODILY FORCE)': 0.18,
+         'UNKNOWN WEAPON/OTHER WEAPON': 0.05, 'HAND GUN': 0.04, 'VERBAL THREAT': 0.03,
+         'KNIFE WITH BLADE 6INCHES OR LESS': 0.03, 'SEMI-AUTOMATIC PISTOL': 0.02}
+LOCAIS = {'STREET': 0.25, 'SINGLE FAMILY DWELLING': 0.17, 'MULTI-UNIT DWELLING (APARTMENT, DUPLEX, ETC)': 0.12,
+          'PARKING LOT': 0.07, 'OTHER BUSINESS': 0.05, 'SIDEWALK': 0.05, 'VEHICLE, PASSENGER/TRUCK': 0.04,
+          'GARAGE/CARPORT': 0.03, 'DRIVEWAY': 0.02, 'missing': 0.2}
+SEXOS = {'M': 0.41, 'F': 0.36, 'X': 0.1, 'missing': 0.13}
+ETNIAS = {'H': 0.3, 'W': 0.2, 'B': 0.14, 'X': 0.1, 'O': 0.08, 'A': 0.02, 'missing': 0.16}
+DISTRITOS_POR_AREA = 25
+
+
+def _sortear(rng, distribuicao, n):
+    """Sorteia n rótulos de um dicionário {rótulo: probabilidade} (normalizado)"""
+    rotulos = list(distribuicao)
+    p = np.array(list(distribuicao.values()), dtype=float)
+    return np.asarray(rotulos, dtype=object)[rng.choice(len(rotulos), n, p=p / p.sum())]
+
+
+def gerar_crimes(n, seed=0, areas=None, inicio='2020-01-01', fim='2025-01-01'):
+    """Registros sintéticos no formato do LAPD, com as colunas usadas pelos dois scripts
+
+    Tipos de crime com cauda de Zipf, áreas com pesos desiguais, DISTRITOS_POR_AREA distritos
+    por área com coordenadas em torno do centro da área e datas/horas uniformes em [inicio, fim).
+    """
+    rng = np.random.default_rng(seed)
+    areas = areas or subgrafos.AREAS
+
+    # Geografia fixa (não depende de n): centro de cada área e de cada distrito
+    geo = np.random.default_rng(12345)
+    centro_area = np.column_stack([geo.uniform(33.75, 34.3, len(subgrafos.AREAS)),
+                                   geo.uniform(-118.6, -118.2, len(subgrafos.AREAS))])
+    desvio_distrito = geo.normal(0, 0.02, (len(subgrafos.AREAS), DISTRITOS_POR_AREA, 2))
+
+    cauda = 1 / np.arange(1, CRIMES_CAUDA + 1)
+    crimes = dict(CRIMES_FREQUENTES)
+    crimes.update({f'OUTRO CRIME {k:03d}': p for k, p in enumerate(
+        cauda / cauda.sum() * (1 - sum(CRIMES_FREQUENTES.values())))})
+
+    indice_area = np.array([subgrafos.AREAS.index(a) for a in areas])
+    peso_area = 1 / np.sqrt(np.arange(1, len(areas) + 1))
+    area = indice_area[rng.choice(len(areas), n, p=peso_area / peso_area.sum())]
+    distrito = rng.integers(0, DISTRITOS_POR_AREA, n)
+    coordenadas = centro_area[area] + desvio_distrito[area, distrito] + rng.normal(0, 0.003, (n, 2))
+
+    inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+    minutos = rng.integers(0, int((fim - inicio) / pd.Timedelta(minutes=1)), n)
+    ocorrencia = inicio + pd.to_timedelta(minutos, unit='min')
+    hora = ocorrencia.hour * 100 + ocorrencia.minute
+    turno = np.select([(hora >= 600) & (hora < 1200), (hora >= 1200) & (hora < 1800)], ['Manhã', 'Tarde'], 'Noite')
+
+    return pd.DataFrame({
+        'DR_NO': np.arange(n, dtype=np.int64) + 200_000_000,
+        'DATE OCC': ocorrencia,
+        'TIME OCC': hora,
+        'ANO': ocorrencia.year,
+        'AREA NAME': np.asarray(subgrafos.AREAS, dtype=object)[area],
+        'Rpt Dist No': (area + 1) * 100 + distrito,
+        'Crm Cd Desc': _sortear(rng, crimes, n),
+        'Weapon Desc': _sortear(rng, ARMAS, n),
+        'Premis Desc': _sortear(rng, LOCAIS, n),
+        'Vict Sex': _sortear(rng, SEXOS, n),
+        'Vict Descent': _sortear(rng, ETNIAS, n),
+        'LAT': coordenadas[:, 0],
+        'LON': coordenadas[:, 1],
+        'Turno': pd.Categorical(turno, categories=subgrafos.TURNOS),
+    })
+
+
+def preparar_contexto(df):
+    """Frames de entrada de cada script a partir dos registros sintéticos"""
+    return {
+        'comunidades': Comunidades.preparar_dados(df),
+        'crimes': codificar(df),
+    }
+
+
+# Etapas: cada uma lê e grava no contexto e retorna as contagens relevantes
+def _etapa_similaridade_exata(ctx):
+    i, j, w = Comunidades.arestas_similaridade(ctx['comunidades'])
+    return {'nos': len(ctx['comunidades']), 'arestas': int(len(i))}
+
+
+def _etapa_similaridade_aproximada(ctx):
+    ctx['arestas_aproximadas'] = arestas_similaridade_aproximada(ctx['comunidades'])
+    return {'nos': len(ctx['comunidades']), 'arestas': int(len(ctx['arestas_aproximadas'][0]))}
+
+
+def _etapa_louvain_csr(ctx):
+    n = len(ctx['comunidades'])
+    A = matriz_adjacencia(n, *ctx['arestas_aproximadas'])
+    particao = best_partition_csr(A, list(range(n)), random_state=Comunidades.RANDOM_SEED)
+    return {'nos': n, 'arestas': int(len(ctx['arestas_aproximadas'][0])),
+            'comunidades': len(set(particao.values()))}
+
+
+def _etapa_subgrafo_a(ctx):
+    ctx['grafo_a'] = subgrafos.montar_subgrafo_a(ctx['crimes'])
+    return {'nos': ctx['grafo_a'].number_of_nodes(), 'arestas': ctx['grafo_a'].number_of_edges()}
+
+
+def _etapa_subgrafo_b(ctx):
+    coords = ctx['crimes'].groupby('Rpt Dist No')[['LAT', 'LON']].mean().dropna()
+    ctx['grafo_b'], _ = subgrafos.montar_subgrafo_b(ctx['crimes'], coords, ctx['grafo_a'])
+    return {'nos': ctx['grafo_b'].number_of_nodes(), 'arestas': ctx['grafo_b'].number_of_edges()}
+
+
+def _etapa_rota(ctx):
+    rota, custo = subgrafos.encontrar_rota(ctx['grafo_b'])
+    return {'nos': ctx['grafo_b'].number_of_nodes(), 'arestas': ctx['grafo_b'].number_of_edges(),
+            'tamanho_rota': len(rota or []), 'custo': custo}
+
+
+# (nome, função, entradas exigidas no contexto)
+ETAPAS = [
+    ('similaridade_exata', _etapa_similaridade_exata, []),
+    ('similaridade_aproximada', _etapa_similaridade_aproximada, []),
+    ('louvain_csr', _etapa_louvain_csr, ['arestas_aproximadas']),
+    ('subgrafo_a', _etapa_subgrafo_a, []),
+    ('subgrafo_b', _etapa_subgrafo_b, ['grafo_a']),
+    ('rota', _etapa_rota, ['grafo_b']),
+]
+
+
+def medir(funcao, *args, memoria=True):
+    """Executa funcao(*args); retorna (resultado, segundos, pico de memória em MB ou None)
+
+    O tempo é medido em uma execução sem rastreamento. Com `memoria`, a função roda uma
+    segunda vez sob o tracemalloc (que inclui os buffers do NumPy, mas deixa o código Python
+    puro bem mais lento) apenas para obter o pico de memória.
+    """
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    segundos = time.perf_counter() - inicio
+
+    pico = None
+    if memoria:
+        tracemalloc.start()
+        try:
+            resultado = funcao(*args)
+            pico = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return resultado, segundos, pico
+
+
+def executar_tamanho(n, seed=0, limites=LIMITES_ETAPAS, memoria=True):
+    """Executa todas as etapas com n linhas sintéticas; retorna uma lista de registros"""
+    ctx = preparar_contexto(gerar_crimes(n, seed))
+    registros = []
+    for nome, funcao, entradas in ETAPAS:
+        registro = {'etapa': nome, 'linhas': n}
+        limite = limites.get(nome)
+        if (limite is not None and n > limite) or any(e not in ctx for e in entradas):
+            registros.append({**registro, 'pulada': True})
+            continue
+        contagens, segundos, pico = medir(funcao, ctx, memoria=memoria)
+        registros.append({**registro, 'segundos': round(segundos, 4),
+                          'pico_memoria_mb': None if pico is None else round(pico, 2), **contagens})
+        print(f"{nome:>24} | {n:>9} linhas | {segundos:9.3f} s", flush=True)
+    return registros
+
+
+def _arestas(G):
+    """{aresta: peso}; em grafos não direcionados a aresta é um frozenset"""
+    if G.is_directed():
+        return {(u, v): d['weight'] for u, v, d in G.edges(data=True)}
+    return {frozenset((u, v)): d['weight'] for u, v, d in G.edges(data=True)}
+
+
+def verificar_equivalencia(n=TAMANHO_VERIFICACAO, seed=0):
+    """Compara as versões otimizadas com as implementações de referência em n linhas
+
+    Os subgrafos usam uma única área em 90 dias, para que haja pares na janela de 24 h e
+    transições entre turnos. A partição CSR é comparada pela modularidade (não pelos rótulos).
+    """
+    resultado = {}
+
+    df = Comunidades.preparar_dados(gerar_crimes(n, seed))
+    referencia = Comunidades.construir_grafo(df)
+    otimizado = Comunidades.construir_grafo_indexado(df)
+    resultado['construir_grafo'] = (_arestas(referencia) == _arestas(otimizado) and
+                                    dict(referencia.nodes(data=True)) == dict(otimizado.nodes(data=True)))
+
+    q_ref = community_louvain.modularity(
+        community_louvain.best_partition(referencia, weight='weight', random_state=Comunidades.RANDOM_SEED),
+        referencia, weight='weight')
+    A, nos = grafo_para_csr(referencia)
+    particao = best_partition_csr(A, nos, random_state=Comunidades.RANDOM_SEED)
+    q_csr = modularidade_csr(A, [particao[no] for no in nos])
+    resultado['best_partition'] = {'modularidade_python_louvain': q_ref, 'modularidade_csr': q_csr,
+                                   'equivalente': bool(q_csr >= q_ref - TOLERANCIA_MODULARIDADE)}
+
+    crimes = codificar(gerar_crimes(n, seed, areas=[subgrafos.AREAS[0]], fim='2020-04-01'))
+    GA = subgrafos.montar_subgrafo_a(crimes, janela=timedelta(hours=24))
+    resultado['montar_subgrafo_a'] = _arestas(GA) == _arestas(subgrafos.montar_subgrafo_a_referencia(crimes))
+
+    coords = crimes.groupby('Rpt Dist No')[['LAT', 'LON']].mean().dropna()
+    GB, _ = subgrafos.montar_subgrafo_b(crimes, coords, GA)
+    GB_ref, _ = subgrafos.montar_subgrafo_b_referencia(crimes, coords, GA)
+    resultado['montar_subgrafo_b'] = _arestas(GB) == _arestas(GB_ref)
+
+    rota, custo = subgrafos.encontrar_rota(GB)
+    rota_ref, custo_ref = subgrafos.encontrar_rota(GB, multiorigem=False)
+    resultado['encontrar_rota'] = bool(rota == rota_ref and np.isclose(custo, custo_ref))
+    _, custo_servico = ServicoRotas(GB).melhor_rota()
+    resultado['servico_rotas'] = bool(np.isclose(custo_servico, custo_ref))
+    return resultado
+
+
+def executar(tamanhos=TAMANHOS, seed=0, limites=LIMITES_ETAPAS, memoria=True, verificar=True):
+    """Relatório completo: ambiente, medições por etapa e tamanho e verificação de equivalência"""
+    relatorio = {
+        'ambiente': {'python': platform.python_version(), 'numpy': np.__version__,
+                     'pandas': pd.__version__, 'plataforma': platform.platform()},
+        'medicoes': [r for n in tamanhos for r in executar_tamanho(n, seed, limites, memoria)],
+    }
+    if verificar:
+        relatorio['verificacao'] = verificar_equivalencia(seed=seed)
+    return relatorio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas de construção de grafos e rotas")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sem-memoria', action='store_true',
+                        help="não repete as etapas sob o tracemalloc para medir o pico de memória")
+    parser.add_argument('--sem-verificacao', action='store_true')
+    parser.add_argument('--saida', default='benchmark.json', help="arquivo JSON do relatório")
+    args = parser.parse_args()
+
+    relatorio = executar(args.tamanhos, args.seed, memoria=not args.sem_memoria,
+                         verificar=not args.sem_verificacao)
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2, default=str)
+    if 'verificacao' in relatorio:
+        print(json.dumps(relatorio['verificacao'], ensure_ascii=False, indent=2, default=str))
+    print(f"Relatório salvo em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+# Diretório onde ficam os dados pré-processados em formato colunar (Feather/Arrow)
+DIRETORIO_CACHE = '.cache_dados'
+
+try:
+    import pyarrow  # noqa: F401
+    ARROW_DISPONIVEL = True
+except ImportError:
+    ARROW_DISPONIVEL = False
+
+
+def chave_cache(caminho, parametros=None, hash_conteudo=False):
+    """Gera a chave do cache a partir do arquivo de origem e dos parâmetros de filtragem
+
+    Por padrão usa tamanho e mtime do arquivo; com `hash_conteudo=True` usa o SHA-1 do conteúdo.
+    """
+    info = os.stat(caminho)
+    origem = {'arquivo': os.path.abspath(caminho), 'tamanho': info.st_size}
+    if hash_conteudo:
+        sha = hashlib.sha1()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1 << 20), b''):
+                sha.update(bloco)
+        origem['sha1'] = sha.hexdigest()
+    else:
+        origem['mtime'] = info.st_mtime_ns
+
+    conteudo = json.dumps({'origem': origem, 'parametros': parametros or {}}, sort_keys=True, default=str)
+    return hashlib.sha1(conteudo.encode('utf-8')).hexdigest()[:16]
+
+
+def prefixo_cache(caminho, preparar):
+    """Prefixo comum a todas as versões em cache de um arquivo de origem e função de preparo
+
+    Inclui um hash curto do caminho absoluto, para que arquivos de mesmo nome em diretórios
+    diferentes não descartem o cache um do outro.
+    """
+    local = hashlib.sha1(str(Path(caminho).resolve()).encode('utf-8')).hexdigest()[:8]
+    return f"{Path(caminho).stem}-{local}-{preparar.__name__}"
+
+
+def garantir_cache(caminho, preparar, parametros=None, diretorio=DIRETORIO_CACHE, hash_conteudo=False):
+    """Garante que o cache colunar de `preparar(caminho)` está atualizado e retorna o seu caminho
+
+    `parametros` deve conter todas as constantes que mudam o resultado de `preparar` (filtros,
+    limites, valores ausentes); só eles e o nome da função entram na chave.
+    """
+    if not ARROW_DISPONIVEL:
+        raise ImportError("O cache colunar requer o pacote pyarrow")
+
+    parametros = dict(parametros or {}, preparar=preparar.__qualname__)
+    prefixo = prefixo_cache(caminho, preparar)
+    destino = Path(diretorio) / f"{prefixo}-{chave_cache(caminho, parametros, hash_conteudo)}.feather"
+    if destino.exists():
+        return destino
+
+    df = preparar(caminho).reset_index(drop=True)
+
+    # Remove versões antigas do mesmo arquivo de origem e grava de forma atômica
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    for antigo in destino.parent.glob(f"{prefixo}-*.feather"):
+        antigo.unlink()
+    temporario = destino.with_suffix(f'.{os.getpid()}.tmp')
+    df.to_feather(temporario, compression='uncompressed')
+    os.replace(temporario, destino)
+
+    return destino
+
+
+def ler_cache(destino, colunas=None, filtro=None):
+    """Lê um arquivo do cache mapeando-o em memória; `filtro` é uma expressão pyarrow.compute
+
+    Cada processo lê o arquivo direto do disco (o Feather não é comprimido e as páginas vêm
+    do page cache do sistema operacional), sem receber DataFrames serializados. A conversão
+    para pandas copia os dados para a memória do processo; `colunas` e `filtro` são
+    aplicados antes dela, então só o recorte pedido é copiado.
+    """
+    from pyarrow import feather
+
+    tabela = feather.read_table(destino, columns=colunas, memory_map=True)
+    if filtro is not None:
+        tabela = tabela.filter(filtro)
+    return tabela.to_pandas()
+
+
+def carregar_com_cache(caminho, preparar, parametros=None, diretorio=DIRETORIO_CACHE, hash_conteudo=False):
+    """Retorna `preparar(caminho)` a partir do cache colunar, reconstruindo-o quando desatualizado
+
+    O DataFrame tipado (datas, categóricos, coordenadas float) é salvo sem compressão em Feather,
+    o que permite leitura rápida e mapeamento em memória. Sem pyarrow, apenas chama `preparar`.
+    """
+    if not ARROW_DISPONIVEL:
+        return preparar(caminho)
+    return ler_cache(garantir_cache(caminho, preparar, parametros, diretorio, hash_conteudo))
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# Atributos categóricos dos registros de crime usados nos grafos
+ATRIBUTOS_CATEGORICOS = [
+    'Crm Cd Desc', 'AREA NAME', 'Weapon Desc',
+    'Premis Desc', 'Vict Sex', 'Vict Descent'
+]
+AUSENTE = -1  # Código de valor ausente ('missing' / NaN)
+ROTULO_AUSENTE = 'missing'
+
+
+def codificar(df, colunas=ATRIBUTOS_CATEGORICOS):
+    """Converte as colunas de texto em categóricas; 'missing' e NaN ficam com código -1"""
+    df = df.copy()
+    for col in colunas:
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        valores = df[col].astype('string').str.strip()
+        valores = valores.mask(valores == ROTULO_AUSENTE)
+        df[col] = valores.astype('category')
+    return df
+
+
+def vocabulario(df, colunas=ATRIBUTOS_CATEGORICOS):
+    """Retorna {coluna: lista de rótulos}, onde a posição do rótulo é o seu código"""
+    return {col: df[col].cat.categories.tolist() for col in colunas if col in df.columns}
+
+
+def codigos(df, col):
+    """Retorna os códigos int32 de uma coluna categórica"""
+    return df[col].cat.codes.to_numpy(dtype=np.int32)
+
+
+def matriz_codigos(df, colunas=ATRIBUTOS_CATEGORICOS):
+    """Empilha os códigos das colunas em uma matriz (linhas x colunas) int32"""
+    matriz = np.empty((len(df), len(colunas)), dtype=np.int32)
+    for k, col in enumerate(colunas):
+        matriz[:, k] = codigos(df, col)
+    return matriz
+
+
+def decodificar(vocab, col, codigo):
+    """Converte um código de volta para o rótulo original"""
+    if codigo is None or codigo == AUSENTE or col not in vocab:
+        return ROTULO_AUSENTE
+    return vocab[col][int(codigo)]
+
+
+def codificar_com_vocabulario(df, vocab, colunas=ATRIBUTOS_CATEGORICOS):
+    """Codifica `df` reaproveitando um vocabulário existente; rótulos novos vão para o final
+
+    Os códigos já atribuídos continuam válidos. Retorna (df codificado, vocabulário atualizado).
+    """
+    df = codificar(df, colunas)
+    vocab = {col: list(rotulos) for col, rotulos in vocab.items()}
+    for col in colunas:
+        if col not in df.columns:
+            continue
+        conhecidos = vocab.setdefault(col, [])
+        vistos = set(conhecidos)
+        conhecidos.extend(r for r in df[col].cat.categories if r not in vistos)
+        df[col] = df[col].cat.set_categories(conhecidos)
+    return df, vocab
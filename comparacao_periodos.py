@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.csgraph import connected_components
+
+from Comunidades import perfil_comunidades
+
+# Acompanhamento de comunidades entre períodos. Cada comunidade vira um vetor esparso com a
+# distribuição de cada atributo do perfil (tipo de crime, área, arma, local, vítima). Como os
+# códigos são do vocabulário de cada período, os vetores são alinhados pelos rótulos. Só os
+# pares com similaridade de cosseno acima do limiar são mantidos (matriz esparsa); o
+# pareamento húngaro é resolvido em cada componente conexa desse grafo bipartido e os demais
+# casos viram eventos de surgimento, desaparecimento, fusão e divisão.
+
+LIMIAR_CONTINUIDADE = 0.5  # Similaridade mínima para considerar duas comunidades relacionadas
+
+
+def perfis_atributos(G, partition):
+    """Frame longo (comunidade, coluna, rótulo, proporção) com a distribuição completa de cada atributo
+
+    Reaproveita Comunidades.perfil_comunidades (top=None); valores ausentes não entram.
+    Retorna também o tamanho de cada comunidade.
+    """
+    perfil = perfil_comunidades(G, partition, top=None)
+    tamanho = pd.Series(partition).value_counts()
+    perfil = perfil.rename(columns={'valor': 'rotulo', 'percentual': 'proporcao'})
+    return perfil[['comunidade', 'coluna', 'rotulo', 'proporcao']], tamanho
+
+
+def matrizes_perfis(perfis, tamanhos):
+    """Matrizes CSR (comunidades x (atributo, rótulo)) de vários períodos no mesmo espaço
+
+    Retorna [(comunidades, matriz) por período], com linhas normalizadas (norma L2 = 1).
+    Comunidades sem nenhum atributo válido ficam com a linha vazia.
+    """
+    caracteristicas = pd.concat([p[['coluna', 'rotulo']] for p in perfis]).drop_duplicates()
+    indice = pd.MultiIndex.from_frame(caracteristicas)
+
+    resultado = []
+    for perfil, tamanho in zip(perfis, tamanhos):
+        comunidades = np.sort(tamanho.index.to_numpy())
+        linhas = np.searchsorted(comunidades, perfil['comunidade'].to_numpy())
+        colunas = indice.get_indexer(pd.MultiIndex.from_frame(perfil[['coluna', 'rotulo']]))
+        X = sparse.csr_matrix((perfil['proporcao'].to_numpy(dtype=float), (linhas, colunas)),
+                              shape=(len(comunidades), len(indice)))
+        norma = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        X = sparse.diags(1 / np.where(norma > 0, norma, 1)) @ X
+        resultado.append((comunidades, X.tocsr()))
+    return resultado
+
+
+def similaridade_comunidades(G1, particao1, G2, particao2, limiar=LIMIAR_CONTINUIDADE):
+    """Similaridade de cosseno entre as comunidades de dois períodos, só nos pares >= limiar
+
+    Retorna (comunidades 1, comunidades 2, matriz CSR c1 x c2, tamanhos 1, tamanhos 2).
+    """
+    perfil1, tamanho1 = perfis_atributos(G1, particao1)
+    perfil2, tamanho2 = perfis_atributos(G2, particao2)
+    (com1, X1), (com2, X2) = matrizes_perfis([perfil1, perfil2], [tamanho1, tamanho2])
+    S = (X1 @ X2.T).tocsr()
+    S.data[S.data < limiar] = 0
+    S.eliminate_zeros()
+    return com1, com2, S, tamanho1, tamanho2
+
+
+def parear_comunidades(S):
+    """Pareamento de peso máximo no grafo bipartido esparso S (pares (linha, coluna))
+
+    O algoritmo húngaro roda em cada componente conexa, em um bloco denso só com as
+    comunidades relacionadas entre si; pares fora do grafo (peso zero) são descartados.
+    """
+    c1, c2 = S.shape
+    bipartido = sparse.bmat([[None, S], [S.T, None]], format='csr')
+    _, componente = connected_components(bipartido, directed=False)
+    comp1, comp2 = componente[:c1], componente[c1:]
+
+    linhas, colunas = [], []
+    for c in np.unique(comp1[np.diff(S.indptr) > 0]):
+        a, b = np.flatnonzero(comp1 == c), np.flatnonzero(comp2 == c)
+        bloco = S[a][:, b].toarray()
+        r, k = linear_sum_assignment(bloco, maximize=True)
+        positivo = bloco[r, k] > 0
+        linhas.extend(a[r[positivo]].tolist())
+        colunas.extend(b[k[positivo]].tolist())
+    return linhas, colunas
+
+
+def _mais_parecida(S):
+    """Para cada linha de S (CSR), a coluna de maior valor armazenado (-1 se a linha for vazia)"""
+    coo = S.tocoo()
+    melhor = np.full(S.shape[0], -1, dtype=np.int64)
+    ordem = np.lexsort((-coo.data, coo.row))
+    primeiro = np.ones(len(ordem), dtype=bool)
+    primeiro[1:] = coo.row[ordem][1:] != coo.row[ordem][:-1]
+    melhor[coo.row[ordem][primeiro]] = coo.col[ordem][primeiro]
+    return melhor
+
+
+def comparar_particoes(G1, particao1, G2, particao2, limiar=LIMIAR_CONTINUIDADE):
+    """Eventos entre as comunidades de dois períodos
+
+    - continuidade: par escolhido pelo algoritmo húngaro entre os pares com similaridade >= limiar;
+    - fusao: comunidade nova que é a mais parecida de duas ou mais comunidades anteriores;
+    - divisao: comunidade anterior que é a mais parecida de duas ou mais comunidades novas;
+    - desaparecimento / surgimento: sem nenhuma comunidade do outro período acima do limiar.
+
+    Retorna um DataFrame com evento, comunidade_anterior, comunidade_nova, similaridade,
+    tamanho_anterior e tamanho_novo (uma linha por par envolvido no evento).
+    """
+    com1, com2, S, tamanho1, tamanho2 = similaridade_comunidades(G1, particao1, G2, particao2, limiar)
+    eventos = []
+
+    def evento(tipo, a=None, b=None):
+        eventos.append({
+            'evento': tipo,
+            'comunidade_anterior': None if a is None else com1[a],
+            'comunidade_nova': None if b is None else com2[b],
+            'similaridade': None if a is None or b is None else float(S[a, b]),
+            'tamanho_anterior': None if a is None else int(tamanho1[com1[a]]),
+            'tamanho_novo': None if b is None else int(tamanho2[com2[b]]),
+        })
+
+    for a, b in zip(*parear_comunidades(S)):
+        evento('continuidade', a, b)
+
+    melhor_novo = _mais_parecida(S)
+    melhor_anterior = _mais_parecida(S.T.tocsr())
+    for b in range(len(com2)):
+        origens = np.flatnonzero(melhor_novo == b)
+        if len(origens) >= 2:
+            for a in origens:
+                evento('fusao', a, b)
+    for a in range(len(com1)):
+        destinos = np.flatnonzero(melhor_anterior == a)
+        if len(destinos) >= 2:
+            for b in destinos:
+                evento('divisao', a, b)
+    for a in np.flatnonzero(melhor_novo < 0):
+        evento('desaparecimento', a=a)
+    for b in np.flatnonzero(melhor_anterior < 0):
+        evento('surgimento', b=b)
+
+    eventos = pd.DataFrame(eventos, columns=['evento', 'comunidade_anterior', 'comunidade_nova', 'similaridade',
+                                             'tamanho_anterior', 'tamanho_novo'])
+    inteiras = ['comunidade_anterior', 'comunidade_nova', 'tamanho_anterior', 'tamanho_novo']
+    return eventos.astype({col: 'Int64' for col in inteiras})
+
+
+def acompanhar_periodos(grafos, particoes, limiar=LIMIAR_CONTINUIDADE):
+    """Eventos entre cada par de períodos consecutivos (na ordem de `grafos`)"""
+    periodos = [p for p in grafos if p in particoes]
+    partes = [comparar_particoes(grafos[p1], particoes[p1], grafos[p2], particoes[p2], limiar)
+              .assign(periodo_anterior=p1, periodo_novo=p2)
+              for p1, p2 in zip(periodos[:-1], periodos[1:])]
+    if not partes:
+        return pd.DataFrame()
+    eventos = pd.concat(partes, ignore_index=True)
+    return eventos[['periodo_anterior', 'periodo_novo'] + [c for c in eventos.columns
+                                                           if c not in ('periodo_anterior', 'periodo_novo')]]
@@ -0,0 +1,45 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+RAIO_TERRA_KM = 6371
+RAIO_ADJACENCIA_KM = 50
+
+# Matrizes de distância já calculadas, por (área, impressão digital das coordenadas)
+_cache_distancias = {}
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Distância em km pela fórmula de haversine; aceita escalares ou arrays (com broadcasting)"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    dlat, dlon = lat2 - lat1, lon2 - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def matriz_distancias(coords):
+    """Matriz Rpt Dist No x Rpt Dist No de distâncias a partir do frame de coordenadas (LAT, LON)"""
+    lat = coords['LAT'].to_numpy(dtype=float)
+    lon = coords['LON'].to_numpy(dtype=float)
+    dist = haversine(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    return pd.DataFrame(dist, index=coords.index, columns=coords.index)
+
+
+def _impressao_digital(coords):
+    """Hash do conteúdo das coordenadas, para não reutilizar a matriz de outro recorte"""
+    valores = pd.util.hash_pandas_object(coords[['LAT', 'LON']], index=True).to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
+
+
+def distancias_area(coords, area=None):
+    """Matriz de distâncias calculada uma única vez por área (e conjunto de coordenadas)"""
+    chave = (area, _impressao_digital(coords))
+    if chave not in _cache_distancias:
+        _cache_distancias[chave] = matriz_distancias(coords)
+    return _cache_distancias[chave]
+
+
+def adjacencia_raio(coords, raio_km=RAIO_ADJACENCIA_KM, area=None):
+    """Matriz booleana indicando quais pares de subáreas estão a até `raio_km` km"""
+    return distancias_area(coords, area) <= raio_km
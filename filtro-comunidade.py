@@ -1,8 +1,11 @@
+import numpy as np
 import pandas as pd
 
-# Carrega o dataset completo
-df = pd.read_csv("/home/thomas/PycharmProjects/CMAC03/ProjetoParcial - Analise Criminal/Cenário 6 - Análise Criminal/Cenário 6 - Crimes_2020-2024 Los Angeles.csv",
-                 encoding="utf-8", sep=";", on_bad_lines='skip')
+CAMINHO_DATASET = "/home/thomas/PycharmProjects/CMAC03/ProjetoParcial - Analise Criminal/Cenário 6 - Análise Criminal/Cenário 6 - Crimes_2020-2024 Los Angeles.csv"
+
+# Leitura em blocos: a memória fica limitada ao tamanho do bloco e não ao dataset
+MODO_STREAMING = True
+TAMANHO_BLOCO = 200_000
 
 # Define os crimes considerados (15 mais recorrentes)
 crimes_considerados = [
@@ -23,34 +26,6 @@ crimes_considerados = [
     "VANDALISM - MISDEAMEANOR ($399 OR UNDER)",
 ]
 
-# Filtra apenas os crimes considerados
-df_filtrado = df[df["Crm Cd Desc"].isin(crimes_considerados)].copy()
-
-# Converte DATA OCC para datetime
-df_filtrado["DATE OCC"] = pd.to_datetime(df_filtrado["DATE OCC"], errors="coerce")
-
-# Remove linhas com datas inválidas
-df_filtrado = df_filtrado.dropna(subset=["DATE OCC"])
-
-# Extrai o ano da ocorrência
-df_filtrado["ANO"] = df_filtrado["DATE OCC"].dt.year
-
-# Função para categorizar o horário em turnos
-def categoriza_tempo(turno):
-    try:
-        time = int(turno)
-        if 0 <= time <= 1200:
-            return "Manhã"
-        elif 1201 <= time <= 1800:
-            return "Tarde"
-        else:
-            return "Noite"
-    except:
-        return "Desconhecido"
-
-# Aplica a categorização de turnos
-df_filtrado["TURNO"] = df_filtrado["TIME OCC"].apply(categoriza_tempo)
-
 # --- INÍCIO DA ALTERAÇÃO: COLUNAS QUE SERÃO MANTIDAS ---
 # Adicione as colunas relevantes para similaridade aqui!
 colunas_mantidas = [
@@ -74,27 +49,142 @@ colunas_mantidas = [
     "LON",
     "ANO"
 ]
-
-# Filtra o DataFrame final para conter apenas as colunas desejadas
-# Lida com colunas que podem não existir no dataset original (se alguma for opcional)
-df_final = df_filtrado[[col for col in colunas_mantidas if col in df_filtrado.columns]].copy()
 # --- FIM DA ALTERAÇÃO ---
 
-# --- NOVA ETAPA: IDENTIFICAR TOP 5 ÁREAS NO DF_FINAL ANTES DA DIVISÃO ---
+# Tipos explícitos para a leitura em blocos (TURNO e ANO são derivados, TIME OCC é lido só para o turno).
+# Identificadores e coordenadas são lidos como texto para não falhar em valores malformados.
+dtypes_leitura = {
+    "DR_NO": "string",
+    "Date Rptd": "string",
+    "Rpt Dist No": "string",
+    "AREA": "string",
+    "AREA NAME": "category",
+    "DATE OCC": "string",
+    "TIME OCC": "string",
+    "Crm Cd": "string",
+    "Crm Cd Desc": "category",
+    "Mocodes": "string",
+    "Vict Age": "string",
+    "Vict Sex": "category",
+    "Vict Descent": "category",
+    "Premis Desc": "category",
+    "Weapon Desc": "category",
+    "Status Desc": "category",
+    "LAT": "string",
+    "LON": "string",
+}
+
 num_top_areas = 5
-contagem_areas = df_final['AREA NAME'].value_counts()
-top_areas_identificadas = contagem_areas.head(num_top_areas).index.tolist()
-print(f"As {num_top_areas} áreas com maior incidência de crimes (considerando 2020-2024 e os crimes selecionados) são: {top_areas_identificadas}")
+periodos = {
+    "comunidades_2020_2022.csv": (2020, 2022),
+    "comunidades_2023_2024.csv": (2023, 2024),
+}
+
+
+# Função para categorizar o horário em turnos
+def categoriza_tempo(turno):
+    try:
+        time = int(turno)
+        if 0 <= time <= 1200:
+            return "Manhã"
+        elif 1201 <= time <= 1800:
+            return "Tarde"
+        else:
+            return "Noite"
+    except:
+        return "Desconhecido"
+
+
+# Versão vetorizada de categoriza_tempo para uma coluna inteira
+def categoriza_tempo_vetorizado(horarios):
+    hora = pd.to_numeric(horarios, errors="coerce")
+    turno = np.select([hora.between(0, 1200), hora.between(1201, 1800)], ["Manhã", "Tarde"], "Noite")
+    return pd.Series(turno, index=horarios.index).where(hora.notna(), "Desconhecido")
+
+
+# Aplica os filtros de crime e data em um bloco e mantém apenas as colunas desejadas
+def filtra_bloco(bloco):
+    bloco = bloco[bloco["Crm Cd Desc"].isin(crimes_considerados)].copy()
+    bloco["DATE OCC"] = pd.to_datetime(bloco["DATE OCC"], errors="coerce")
+    bloco = bloco.dropna(subset=["DATE OCC"])
+    bloco["ANO"] = bloco["DATE OCC"].dt.year
+    bloco["TURNO"] = categoriza_tempo_vetorizado(bloco["TIME OCC"])
+    return bloco[[col for col in colunas_mantidas if col in bloco.columns]]
+
+
+# Lê o CSV em blocos, apenas com as colunas necessárias
+def le_blocos(caminho):
+    colunas_leitura = set(colunas_mantidas) | {"TIME OCC"}
+    return pd.read_csv(caminho, encoding="utf-8", sep=";", on_bad_lines='skip',
+                       usecols=lambda col: col in colunas_leitura, dtype=dtypes_leitura,
+                       chunksize=TAMANHO_BLOCO)
+
+
+# Primeira passada: conta os crimes por área para escolher as top áreas
+def conta_areas(caminho):
+    contagem = pd.Series(dtype="int64")
+    for bloco in le_blocos(caminho):
+        contagem_bloco = filtra_bloco(bloco)["AREA NAME"].value_counts()
+        contagem = contagem.add(contagem_bloco.rename(index=str), fill_value=0)
+    return contagem.astype("int64").sort_values(ascending=False)
+
+
+# Segunda passada: grava cada bloco diretamente nos arquivos de cada período
+def grava_periodos(caminho, top_areas):
+    cabecalho_escrito = set()
+    for bloco in le_blocos(caminho):
+        bloco = filtra_bloco(bloco)
+        bloco = bloco[bloco["AREA NAME"].isin(top_areas)]
+        for arquivo, (inicio, fim) in periodos.items():
+            parte = bloco[bloco["ANO"].between(inicio, fim)]
+            primeiro = arquivo not in cabecalho_escrito
+            if parte.empty and not primeiro:
+                continue
+            parte.to_csv(arquivo, index=False, sep=";", encoding="utf-8",
+                         mode="w" if primeiro else "a", header=primeiro)
+            cabecalho_escrito.add(arquivo)
+
+
+if MODO_STREAMING:
+    contagem_areas = conta_areas(CAMINHO_DATASET)
+    top_areas_identificadas = contagem_areas.head(num_top_areas).index.tolist()
+    print(f"As {num_top_areas} áreas com maior incidência de crimes (considerando 2020-2024 e os crimes selecionados) são: {top_areas_identificadas}")
+    grava_periodos(CAMINHO_DATASET, top_areas_identificadas)
+
+else:
+    # Carrega o dataset completo
+    df = pd.read_csv(CAMINHO_DATASET, encoding="utf-8", sep=";", on_bad_lines='skip')
+
+    # Filtra apenas os crimes considerados
+    df_filtrado = df[df["Crm Cd Desc"].isin(crimes_considerados)].copy()
+
+    # Converte DATA OCC para datetime
+    df_filtrado["DATE OCC"] = pd.to_datetime(df_filtrado["DATE OCC"], errors="coerce")
+
+    # Remove linhas com datas inválidas
+    df_filtrado = df_filtrado.dropna(subset=["DATE OCC"])
+
+    # Extrai o ano da ocorrência
+    df_filtrado["ANO"] = df_filtrado["DATE OCC"].dt.year
+
+    # Aplica a categorização de turnos
+    df_filtrado["TURNO"] = df_filtrado["TIME OCC"].apply(categoriza_tempo)
+
+    # Filtra o DataFrame final para conter apenas as colunas desejadas
+    # Lida com colunas que podem não existir no dataset original (se alguma for opcional)
+    df_final = df_filtrado[[col for col in colunas_mantidas if col in df_filtrado.columns]].copy()
 
-# --- FILTRAR DF_FINAL PELAS TOP_AREAS IDENTIFICADAS ---
-df_final_filtrado_top_areas = df_final[df_final['AREA NAME'].isin(top_areas_identificadas)].copy()
+    # --- NOVA ETAPA: IDENTIFICAR TOP 5 ÁREAS NO DF_FINAL ANTES DA DIVISÃO ---
+    contagem_areas = df_final['AREA NAME'].value_counts()
+    top_areas_identificadas = contagem_areas.head(num_top_areas).index.tolist()
+    print(f"As {num_top_areas} áreas com maior incidência de crimes (considerando 2020-2024 e os crimes selecionados) são: {top_areas_identificadas}")
 
-# Divide em dois blocos: 2020–2022 e 2023–2024 (agora já filtrados pelas top áreas)
-df_2020_2022 = df_final_filtrado_top_areas[df_final_filtrado_top_areas["ANO"].between(2020, 2022)].copy()
-df_2023_2024 = df_final_filtrado_top_areas[df_final_filtrado_top_areas["ANO"].between(2023, 2024)].copy()
+    # --- FILTRAR DF_FINAL PELAS TOP_AREAS IDENTIFICADAS ---
+    df_final_filtrado_top_areas = df_final[df_final['AREA NAME'].isin(top_areas_identificadas)].copy()
 
-# Salva os arquivos resultantes
-df_2020_2022.to_csv("comunidades_2020_2022.csv", index=False, sep=";", encoding="utf-8")
-df_2023_2024.to_csv("comunidades_2023_2024.csv", index=False, sep=";", encoding="utf-8")
+    # Divide em dois blocos: 2020–2022 e 2023–2024 (agora já filtrados pelas top áreas) e salva
+    for arquivo, (inicio, fim) in periodos.items():
+        df_periodo = df_final_filtrado_top_areas[df_final_filtrado_top_areas["ANO"].between(inicio, fim)].copy()
+        df_periodo.to_csv(arquivo, index=False, sep=";", encoding="utf-8")
 
-print("Filtragem concluída, top áreas identificadas e datasets separados com sucesso!")
\ No newline at end of file
+print("Filtragem concluída, top áreas identificadas e datasets separados com sucesso!")
@@ -0,0 +1,191 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from Comunidades import (BLOCOS_SIMILARIDADE, LIMIAR_SIMILARIDADE, PESOS_SIMILARIDADE, GrafoCSR,
+                         _atributos_nos, similaridade_pares, tabela_atributos)
+from codificacao import codificar_com_vocabulario, matriz_codigos, vocabulario
+from distancias import RAIO_ADJACENCIA_KM
+from louvain_esparso import best_partition_csr, grafo_para_csr, matriz_adjacencia
+from subgrafos import adicionar_transicoes, contar_pares_janela, contar_transicoes, nos_subgrafo_b
+
+# Atualização incremental: a cada novo lote de crimes (ex.: um mês do LAPD) só são calculadas
+# as arestas que envolvem os crimes novos, e a partição parte da partição anterior.
+
+BASE_CHAVE = 1 << 16  # Cada código de atributo ocupa 16 bits na chave dos blocos
+
+
+def _chaves(codigos, colunas):
+    """Chave int64 de cada linha para um bloco, estável entre lotes (-1 se houver atributo ausente)"""
+    chave = np.zeros(len(codigos), dtype=np.int64)
+    validos = np.ones(len(codigos), dtype=bool)
+    for col in colunas:
+        chave = chave * BASE_CHAVE + codigos[:, col]
+        validos &= codigos[:, col] >= 0
+    return np.where(validos, chave, -1)
+
+
+def _agrupar(chave, deslocamento=0):
+    """{chave: posições (ordenadas)} das linhas com chave válida"""
+    validos = np.flatnonzero(chave >= 0)
+    ordem = validos[np.argsort(chave[validos], kind='stable')]
+    unicas, inicio = np.unique(chave[ordem], return_index=True)
+    return dict(zip(unicas.tolist(), np.split(ordem + deslocamento, inicio[1:])))
+
+
+class IndiceAtributos:
+    """Índice invertido (bloco → chave → posições) dos crimes já presentes no grafo de similaridade
+
+    Usa os mesmos blocos de Comunidades.arestas_similaridade: tipo de crime, área + outro
+    atributo e trios de atributos de peso 1.
+    """
+
+    def __init__(self, df):
+        self.vocab = vocabulario(df)
+        self.ids = df['DR_NO'].tolist()
+        self.codigos = matriz_codigos(df, list(PESOS_SIMILARIDADE))
+        self.blocos = [[0]] + BLOCOS_SIMILARIDADE
+        self.indice = [_agrupar(_chaves(self.codigos, colunas)) for colunas in self.blocos]
+
+    def adicionar(self, df_novos):
+        """Indexa crimes novos; retorna (df codificado, i, j, peso) apenas das arestas novas"""
+        if any(len(rotulos) >= BASE_CHAVE for rotulos in self.vocab.values()):
+            raise ValueError("Vocabulário grande demais para a chave dos blocos")
+
+        df_novos, self.vocab = codificar_com_vocabulario(df_novos, self.vocab)
+        novos = matriz_codigos(df_novos, list(PESOS_SIMILARIDADE))
+        n0 = len(self.codigos)
+        self.codigos = np.vstack([self.codigos, novos])
+        self.ids.extend(df_novos['DR_NO'].tolist())
+
+        # Candidatos: novos x antigos e novos x novos que compartilham a chave de algum bloco
+        fontes, destinos = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+        for colunas, indice in zip(self.blocos, self.indice):
+            for chave, posicoes in _agrupar(_chaves(novos, colunas), n0).items():
+                antigos = indice.get(chave, np.empty(0, dtype=np.int64))
+                fontes.append(np.repeat(antigos, len(posicoes)))
+                destinos.append(np.tile(posicoes, len(antigos)))
+                a, b = np.triu_indices(len(posicoes), 1)
+                fontes.append(posicoes[a])
+                destinos.append(posicoes[b])
+                indice[chave] = np.concatenate([antigos, posicoes])
+
+        total = len(self.codigos)
+        par = np.unique(np.concatenate(fontes) * total + np.concatenate(destinos))
+        i, j = par // total, par % total
+        peso = similaridade_pares(self.codigos, i, j)
+        manter = peso >= LIMIAR_SIMILARIDADE
+        return df_novos, i[manter], j[manter], peso[manter]
+
+
+def atualizar_grafo_similaridade(G, indice, df_novos):
+    """Acrescenta ao grafo os crimes novos e apenas as arestas que os envolvem
+
+    Aceita um GrafoCSR (estende a adjacência e a tabela de atributos) ou um nx.Graph; neste,
+    se houver a adjacência CSR em G.graph['csr'], ela também é estendida.
+    Retorna o DataFrame dos novos crimes codificado com o vocabulário do grafo.
+    """
+    df_novos, i, j, w = indice.adicionar(df_novos)
+    G.graph['vocabulario'] = indice.vocab
+    if not isinstance(G, GrafoCSR):
+        G.add_nodes_from(zip(df_novos['DR_NO'], _atributos_nos(df_novos)))
+        G.add_weighted_edges_from(zip([indice.ids[k] for k in i], [indice.ids[k] for k in j], w.tolist()))
+
+    if 'csr' in G.graph:
+        A, _ = G.graph['csr']
+        n = len(indice.ids)
+        A = sparse.csr_matrix(A)
+        A.resize((n, n))
+        A = (A + matriz_adjacencia(n, i, j, w)).tocsr()
+        if isinstance(G, GrafoCSR):
+            G.estender(A, indice.ids, tabela_atributos(df_novos))
+        else:
+            G.graph['csr'] = (A, list(indice.ids))
+    return df_novos
+
+
+def atualizar_particao(G, particao_anterior, metodo='louvain', random_state=None):
+    """Louvain com partida a quente: crimes já conhecidos começam na comunidade anterior"""
+    A, ids = G.graph.get('csr') or grafo_para_csr(G)
+    return best_partition_csr(A, ids, metodo, random_state=random_state, particao=particao_anterior)
+
+
+def _recorte_temporal(historico, inicio, fim, incluir_fim=True):
+    """Linhas de `historico` (ordenado por 'DATE OCC') com data em [inicio, fim] (ou [inicio, fim))"""
+    datas = historico['DATE OCC']
+    lado_fim = 'right' if incluir_fim else 'left'
+    return historico.iloc[datas.searchsorted(inicio, side='left'):datas.searchsorted(fim, side=lado_fim)]
+
+
+def anexar_historico(historico, novos):
+    """Junta os crimes novos ao histórico mantendo-o ordenado por 'DATE OCC'"""
+    juntos = pd.concat([historico, novos], ignore_index=True)
+    if not juntos['DATE OCC'].is_monotonic_increasing:
+        juntos = juntos.sort_values('DATE OCC', kind='stable', ignore_index=True)
+    return juntos
+
+
+def atualizar_subgrafo_a(GA, historico, novos, janela=timedelta(hours=24)):
+    """Soma ao subgrafo A apenas os pares (c1, c2) que envolvem crimes novos
+
+    `historico` deve estar ordenado por 'DATE OCC'. Só são relidos os crimes antigos das
+    subáreas afetadas em [primeira data nova - janela, última data nova + janela]; os nós
+    (crimes principais) do subgrafo são mantidos.
+    """
+    novos = novos[novos['DATE OCC'].notna()]
+    if novos.empty:
+        return GA
+
+    crimes = list(GA.nodes)
+    antigos = _recorte_temporal(historico, novos['DATE OCC'].min() - janela, novos['DATE OCC'].max() + janela)
+    antigos = antigos[antigos['Rpt Dist No'].isin(novos['Rpt Dist No'].unique())]
+    delta = (contar_pares_janela(pd.concat([antigos, novos]), crimes, janela) -
+             contar_pares_janela(antigos, crimes, janela))
+
+    for a, b in zip(*np.nonzero(delta)):
+        atual = GA.get_edge_data(crimes[a], crimes[b], default={'weight': 0})['weight']
+        GA.add_edge(crimes[a], crimes[b], weight=atual + int(delta[a, b]))
+    return GA
+
+
+def atualizar_transicoes(transicoes, historico, novos, coords, raio_km=RAIO_ADJACENCIA_KM, area=None):
+    """Atualiza as contagens de transições (ver subgrafos.contar_transicoes) só nas datas afetadas
+
+    `historico` deve estar ordenado por 'DATE OCC'. As datas que receberam crimes novos são
+    recontadas com e sem eles, e a diferença é somada às contagens anteriores. O subgrafo B
+    não é tocado: aplique o resultado com atualizar_subgrafo_b (ou monte um novo grafo).
+    """
+    datas = novos['DATE OCC'].dropna().dt.normalize()
+    if datas.empty:
+        return transicoes
+
+    antigos = _recorte_temporal(historico, datas.min(), datas.max() + pd.Timedelta(days=1), incluir_fim=False)
+    antigos = antigos[antigos['DATE OCC'].dt.normalize().isin(datas.unique())]
+    com_novos = contar_transicoes(pd.concat([antigos, novos]), coords, raio_km, area)
+    sem_novos = contar_transicoes(antigos, coords, raio_km, area)
+    sem_novos['n'] = -sem_novos['n']
+
+    chaves = ['turno1', 'sub1', 'sub2', 'crime1', 'crime2']
+    total = (pd.concat([transicoes, com_novos, sem_novos], ignore_index=True)
+             .groupby(chaves, dropna=False)['n'].sum().astype(np.int64).reset_index())
+    return total[total['n'] != 0].reset_index(drop=True)
+
+
+def montar_subgrafo_b_de_transicoes(coords, transicoes, GA):
+    """Subgrafo B a partir das contagens acumuladas e dos pesos atuais do subgrafo A"""
+    G, pos = nos_subgrafo_b(coords)
+    adicionar_transicoes(G, transicoes, GA)
+    return G, pos
+
+
+def atualizar_subgrafo_b(GB, transicoes, GA):
+    """Refaz no lugar as arestas do subgrafo B com as contagens e os pesos atuais do subgrafo A
+
+    Os nós são mantidos e a versão dos pesos (subgrafos.invalidar_pesos) é incrementada, então
+    um rotas.ServicoRotas sobre GB recalcula as árvores na próxima consulta.
+    """
+    GB.remove_edges_from(list(GB.edges))
+    adicionar_transicoes(GB, transicoes, GA)
+    return GB
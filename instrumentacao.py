@@ -0,0 +1,162 @@
+import cProfile
+import json
+import os
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+    RESOURCE_DISPONIVEL = True
+except ImportError:  # Windows
+    RESOURCE_DISPONIVEL = False
+
+# Instrumentação leve do pipeline: cronômetro por etapa, memória residente (atual e pico),
+# contagens de linhas/nós/arestas, cProfile opcional por etapa e registro dos erros com
+# traceback. Tudo vai para um relatório JSON por execução. Fora de uma Execucao ativa,
+# `etapa` só cronometra, então as funções instrumentadas podem ser usadas normalmente.
+
+# Execução ativa no processo (a mais interna, se houver execuções aninhadas)
+_execucao_atual = None
+
+
+def rss_atual_mb():
+    """Memória residente atual do processo em MB (None se /proc não estiver disponível)"""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def pico_rss_mb():
+    """Pico de memória residente do processo desde o início, em MB (None sem o módulo resource)"""
+    if not RESOURCE_DISPONIVEL:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB e macOS em bytes
+    return pico / 2 ** 20 if sys.platform == 'darwin' else pico / 2 ** 10
+
+
+def descrever_erro(erro, contexto=None):
+    """Dicionário serializável com tipo, mensagem e traceback de uma exceção"""
+    return {
+        'contexto': contexto,
+        'tipo': type(erro).__name__,
+        'mensagem': str(erro),
+        'traceback': ''.join(traceback.format_exception(type(erro), erro, erro.__traceback__)),
+    }
+
+
+class Execucao:
+    """Coleta as etapas de uma execução e grava o relatório JSON ao sair do bloco `with`
+
+    Com `perfilar=True`, cada etapa de nível mais externo é perfilada com cProfile e o
+    resultado é gravado em `diretorio_perfis`/<ordem>-<etapa>.prof (abrir com pstats ou snakeviz).
+    """
+
+    def __init__(self, nome, arquivo=None, perfilar=False, diretorio_perfis='perfis'):
+        self.nome = nome
+        self.arquivo = arquivo
+        self.perfilar = perfilar
+        self.diretorio_perfis = Path(diretorio_perfis)
+        self.etapas = []
+        self.erros = []
+        self._pilha = []
+        self._perfil_ativo = False
+        self._anterior = None
+
+    def __enter__(self):
+        global _execucao_atual
+        self._anterior, _execucao_atual = _execucao_atual, self
+        self.inicio = datetime.now()
+        self._relogio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        global _execucao_atual
+        _execucao_atual = self._anterior
+        if erro is not None:
+            self.registrar_erro(erro, 'execucao')
+        self.duracao = time.perf_counter() - self._relogio
+        if self.arquivo:
+            self.salvar(self.arquivo)
+        return False
+
+    @contextmanager
+    def etapa(self, nome, **contagens):
+        """Mede uma etapa; o dicionário devolvido aceita contagens extras (nos, arestas, ...)"""
+        caminho = '/'.join(self._pilha + [nome])
+        registro = {'etapa': caminho, **contagens}
+        perfil = None
+        if self.perfilar and not self._perfil_ativo:
+            perfil, self._perfil_ativo = cProfile.Profile(), True
+
+        self._pilha.append(nome)
+        rss_inicio = rss_atual_mb()
+        inicio = time.perf_counter()
+        if perfil:
+            perfil.enable()
+        try:
+            yield registro
+        except BaseException as erro:
+            registro['erro'] = f"{type(erro).__name__}: {erro}"
+            raise
+        finally:
+            if perfil:
+                perfil.disable()
+                self._perfil_ativo = False
+                self.diretorio_perfis.mkdir(parents=True, exist_ok=True)
+                nome_arquivo = f"{len(self.etapas):03d}-{caminho.replace('/', '__').replace(' ', '_')}.prof"
+                arquivo = self.diretorio_perfis / nome_arquivo
+                perfil.dump_stats(arquivo)
+                registro['perfil'] = str(arquivo)
+            registro['segundos'] = time.perf_counter() - inicio
+            registro['rss_inicio_mb'] = rss_inicio
+            registro['rss_fim_mb'] = rss_atual_mb()
+            registro['pico_rss_mb'] = pico_rss_mb()
+            self._pilha.pop()
+            self.etapas.append(registro)
+
+    def registrar_erro(self, erro, contexto=None):
+        """Guarda a exceção (com traceback) no relatório"""
+        self.erros.append(descrever_erro(erro, contexto))
+
+    def relatorio(self):
+        return {
+            'execucao': self.nome,
+            'inicio': self.inicio.isoformat(timespec='seconds'),
+            'duracao_segundos': getattr(self, 'duracao', time.perf_counter() - self._relogio),
+            'pico_rss_mb': pico_rss_mb(),
+            'etapas': self.etapas,
+            'erros': self.erros,
+        }
+
+    def salvar(self, arquivo):
+        with open(arquivo, 'w', encoding='utf-8') as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2, default=str)
+
+
+@contextmanager
+def etapa(nome, **contagens):
+    """Etapa da execução ativa; sem execução ativa devolve um dicionário avulso só com os segundos"""
+    if _execucao_atual is None:
+        registro = dict(contagens)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] = time.perf_counter() - inicio
+    else:
+        with _execucao_atual.etapa(nome, **contagens) as registro:
+            yield registro
+
+
+def registrar_erro(erro, contexto=None):
+    """Registra a exceção na execução ativa (se houver)"""
+    if _execucao_atual is not None:
+        _execucao_atual.registrar_erro(erro, contexto)
@@ -0,0 +1,112 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import networkx as nx
+import pandas as pd
+
+import Comunidades
+import subgrafos
+from cache_colunar import garantir_cache, ler_cache
+from distancias import RAIO_ADJACENCIA_KM
+from louvain_esparso import modularidade
+
+# Executor em lote: distribui períodos ou pares (área, ano) independentes entre processos.
+# Os dados limpos são gravados uma vez no cache Feather (não comprimido) e cada processo lê
+# dele só as colunas e linhas de que precisa, sem serializar DataFrames entre processos.
+
+COLUNAS_SUBGRAFOS = ['AREA NAME', 'ANO', 'DATE OCC', 'Rpt Dist No', 'Crm Cd Desc', 'Turno', 'LAT', 'LON']
+
+
+def _tarefa_periodo(periodo, arquivo):
+    """Processo de trabalho: grafo de similaridade e comunidades de um período"""
+    df = ler_cache(arquivo)
+    G, partition = Comunidades.detectar_comunidades(df)
+    return {
+        'Período': periodo,
+        'Nós': G.number_of_nodes(),
+        'Arestas': G.number_of_edges(),
+        'Densidade': nx.density(G),
+        'Modularidade': modularidade(partition, G),
+        'Comunidades': len(set(partition.values())),
+        'particao': partition,
+    }
+
+
+def _tarefa_area_ano(arquivo, area, ano, janela, raio_km):
+    """Processo de trabalho: subgrafos A e B e rota crítica de uma área em um ano"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    filtro = (pc.field('AREA NAME').cast(pa.string()) == area) & (pc.field('ANO') == ano)
+    df = ler_cache(arquivo, COLUNAS_SUBGRAFOS, filtro)
+    GA, GB, _, rota, custo = subgrafos.analisar_area_ano(df, area, ano, janela, raio_km)
+    return {
+        'Área': area,
+        'Ano': ano,
+        'Crimes': len(df),
+        'Nós A': GA.number_of_nodes(),
+        'Arestas A': GA.number_of_edges(),
+        'Nós B': GB.number_of_nodes(),
+        'Arestas B': GB.number_of_edges(),
+        'Rota': rota,
+        'Custo': custo,
+        'grafo_a': GA,
+        'grafo_b': GB,
+    }
+
+
+def _executar(tarefas, trabalhadores):
+    """Executa as tarefas (função, argumentos) no pool e devolve os resultados na ordem de envio"""
+    with ProcessPoolExecutor(max_workers=trabalhadores) as pool:
+        futuros = {pool.submit(funcao, *args): k for k, (funcao, args) in enumerate(tarefas)}
+        resultados = [None] * len(tarefas)
+        for futuro in as_completed(futuros):
+            resultados[futuros[futuro]] = futuro.result()
+    return resultados
+
+
+def executar_periodos(caminhos=None, trabalhadores=None):
+    """Processa os períodos em paralelo; retorna (tabela resumo, {período: partição})"""
+    caminhos = caminhos or Comunidades.CAMINHOS_PERIODOS
+    tarefas = []
+    for periodo, caminho in caminhos.items():
+        arquivo = garantir_cache(caminho, Comunidades.carregar_periodo, Comunidades.parametros_periodo())
+        tarefas.append((_tarefa_periodo, (periodo, arquivo)))
+
+    resultados = _executar(tarefas, trabalhadores)
+    particoes = {r['Período']: r.pop('particao') for r in resultados}
+    return pd.DataFrame(resultados).set_index('Período'), particoes
+
+
+def executar_areas_anos(areas=None, anos=None, arquivo_crimes=None, trabalhadores=None,
+                        janela=timedelta(hours=24), raio_km=RAIO_ADJACENCIA_KM):
+    """Processa cada par (área, ano) em paralelo; retorna (tabela resumo, {(área, ano): (GA, GB)})"""
+    arquivo = garantir_cache(arquivo_crimes or subgrafos.ARQUIVO_CRIMES, subgrafos.preparar_crimes)
+    tarefas = [(_tarefa_area_ano, (arquivo, area, ano, janela, raio_km))
+               for area in (areas or subgrafos.AREAS) for ano in (anos or subgrafos.ANOS)]
+
+    resultados = _executar(tarefas, trabalhadores)
+    grafos = {(r['Área'], r['Ano']): (r.pop('grafo_a'), r.pop('grafo_b')) for r in resultados}
+    return pd.DataFrame(resultados).set_index(['Área', 'Ano']), grafos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Execução em lote dos períodos ou das áreas/anos")
+    parser.add_argument('modo', choices=['periodos', 'areas'])
+    parser.add_argument('--trabalhadores', type=int, default=os.cpu_count(),
+                        help="número de processos (padrão: todos os núcleos)")
+    args = parser.parse_args()
+
+    if args.modo == 'periodos':
+        resumo, _ = executar_periodos(trabalhadores=args.trabalhadores)
+        print("\n=== COMPARAÇÃO ENTRE PERÍODOS ===")
+    else:
+        resumo, _ = executar_areas_anos(trabalhadores=args.trabalhadores)
+        print("\n=== COMPARAÇÃO ENTRE ÁREAS E ANOS ===")
+    print(resumo.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+# Backend de detecção de comunidades sobre matriz de adjacência CSR (SciPy).
+# Convenção: a matriz é simétrica e a diagonal guarda o dobro do peso dos laços,
+# de modo que a soma de cada linha é o grau ponderado do nó (como no networkx).
+
+LIMIAR_GANHO = 1e-12
+MAX_TENTATIVAS_LOTE = 8  # Metades sorteadas de um lote de movimentos antes de desistir da varredura
+
+
+def matriz_adjacencia(n, i, j, w):
+    """Monta a adjacência CSR simétrica n x n a partir de arestas não direcionadas (i, j, peso)"""
+    i, j, w = np.asarray(i), np.asarray(j), np.asarray(w, dtype=float)
+    laco = i == j
+    linhas = np.concatenate([i, j[~laco], i[laco]])
+    colunas = np.concatenate([j, i[~laco], j[laco]])
+    pesos = np.concatenate([w, w[~laco], w[laco]])
+    return sparse.csr_matrix((pesos, (linhas, colunas)), shape=(n, n))
+
+
+def grafo_para_csr(G, weight='weight'):
+    """Converte um grafo networkx não direcionado em (matriz CSR, lista de nós)"""
+    nos = list(G.nodes)
+    A = nx.to_scipy_sparse_array(G, nodelist=nos, weight=weight, format='csr')
+    A = sparse.csr_matrix(A, dtype=float)
+    return (A + sparse.diags(A.diagonal())).tocsr(), nos
+
+
+def modularidade_csr(A, rotulos, resolucao=1.0):
+    """Modularidade da partição `rotulos` (array de comunidades por nó)"""
+    rotulos = np.asarray(rotulos)
+    k = np.asarray(A.sum(axis=1)).ravel()
+    m2 = k.sum()
+    if m2 == 0:
+        return 0.0
+    coo = A.tocoo()
+    interno = coo.data[rotulos[coo.row] == rotulos[coo.col]].sum()
+    _, compactos = np.unique(rotulos, return_inverse=True)
+    tot = np.bincount(compactos, weights=k)
+    return float(interno / m2 - resolucao * ((tot / m2) ** 2).sum())
+
+
+def _modularidade_fora(fora, laco, k, m2, rotulos, resolucao):
+    """Modularidade a partir da parte fora da diagonal (COO) e da diagonal, com k e m2 já calculados"""
+    interno = fora.data[rotulos[fora.row] == rotulos[fora.col]].sum() + laco.sum()
+    tot = np.bincount(rotulos, weights=k)
+    return interno / m2 - resolucao * ((tot / m2) ** 2).sum()
+
+
+def _mover_nos(A, rotulos, resolucao, rng):
+    """Fase de movimentação local em lote: cada varredura avalia todos os nós com operações de matriz
+
+    A ligação de cada nó com cada comunidade vizinha sai de (A sem diagonal) @ P, e cada nó
+    escolhe a comunidade de maior ganho. Para evitar trocas simultâneas que se anulam, as
+    varreduras alternam o sentido permitido (só para rótulos maiores, depois só menores).
+    Um lote só é aceito se a modularidade subir; senão é sorteada metade dos movimentos.
+    """
+    n = A.shape[0]
+    k = np.asarray(A.sum(axis=1)).ravel()
+    m2 = k.sum()
+    if m2 == 0:
+        return rotulos, False
+
+    laco = A.diagonal()
+    coo = A.tocoo()
+    fora_diagonal = coo.row != coo.col
+    fora = sparse.coo_matrix((coo.data[fora_diagonal], (coo.row[fora_diagonal], coo.col[fora_diagonal])),
+                             shape=A.shape)
+    fora_csr = fora.tocsr()
+    q = _modularidade_fora(fora, laco, k, m2, rotulos, resolucao)
+    houve_mudanca, sem_ganho, varredura = False, 0, 0
+
+    while sem_ganho < 2:
+        sentido = 1 if varredura % 2 == 0 else -1
+        varredura += 1
+        tot = np.bincount(rotulos, weights=k, minlength=n)
+        P = sparse.csr_matrix((np.ones(n), (np.arange(n), rotulos)), shape=(n, n))
+        ligacoes = (fora_csr @ P).tocoo()
+        no, comunidade, ligacao = ligacoes.row, ligacoes.col, ligacoes.data
+
+        # Ganho de ficar na comunidade atual (sem o próprio nó no total da comunidade)
+        na_atual = rotulos[no] == comunidade
+        ganho_atual = (np.bincount(no[na_atual], weights=ligacao[na_atual], minlength=n)
+                       - resolucao * k * (tot[rotulos] - k) / m2)
+
+        # Melhor comunidade vizinha de cada nó no sentido desta varredura
+        candidato = ~na_atual & (np.sign(comunidade - rotulos[no]) == sentido)
+        no, comunidade = no[candidato], comunidade[candidato]
+        ganho = ligacao[candidato] - resolucao * k[no] * tot[comunidade] / m2
+        ordem = np.lexsort((-ganho, no))
+        no, comunidade, ganho = no[ordem], comunidade[ordem], ganho[ordem]
+        primeiro = np.ones(len(no), dtype=bool)
+        primeiro[1:] = no[1:] != no[:-1]
+        melhora = ganho[primeiro] > ganho_atual[no[primeiro]] + LIMIAR_GANHO
+        no, comunidade = no[primeiro][melhora], comunidade[primeiro][melhora]
+
+        aceito = False
+        for _ in range(MAX_TENTATIVAS_LOTE):
+            if not len(no):
+                break
+            novos = rotulos.copy()
+            novos[no] = comunidade
+            q_novo = _modularidade_fora(fora, laco, k, m2, novos, resolucao)
+            if q_novo > q + LIMIAR_GANHO:
+                rotulos, q, aceito = novos, q_novo, True
+                break
+            sorteio = rng.random(len(no)) < 0.5
+            no, comunidade = no[sorteio], comunidade[sorteio]
+
+        if aceito:
+            houve_mudanca, sem_ganho = True, 0
+        else:
+            sem_ganho += 1
+
+    return rotulos, houve_mudanca
+
+
+def _agregar(A, rotulos):
+    """Grafo induzido: uma super-nó por comunidade, arestas somadas (internas viram laços)"""
+    n, c = A.shape[0], rotulos.max() + 1
+    P = sparse.csr_matrix((np.ones(n), (np.arange(n), rotulos)), shape=(n, c))
+    return (P.T @ A @ P).tocsr()
+
+
+def louvain_csr(A, resolucao=1.0, random_state=None, particao_inicial=None):
+    """Louvain sobre a matriz CSR; retorna o array de comunidades de cada nó
+
+    `particao_inicial` (array de rótulos) permite partir de uma partição anterior.
+    """
+    rng = np.random.default_rng(random_state)
+    A = sparse.csr_matrix(A, dtype=float)
+    n = A.shape[0]
+    if particao_inicial is None:
+        rotulos = np.arange(n)
+    else:
+        rotulos = np.unique(np.asarray(particao_inicial), return_inverse=True)[1]
+    membro = np.arange(n)
+
+    while True:
+        rotulos, mudou = _mover_nos(A, rotulos, resolucao, rng)
+        rotulos = np.unique(rotulos, return_inverse=True)[1]
+        membro = rotulos[membro]
+        if not mudou and rotulos.max(initial=-1) + 1 == A.shape[0]:
+            break
+        A = _agregar(A, rotulos)
+        rotulos = np.arange(A.shape[0])
+
+    return membro
+
+
+def leiden_csr(A, resolucao=1.0, random_state=None, particao_inicial=None):
+    """Leiden sobre a matriz CSR via leidenalg (dependência opcional: igraph + leidenalg)"""
+    try:
+        import igraph as ig
+        import leidenalg
+    except ImportError as erro:
+        raise ImportError("O método 'leiden' requer os pacotes igraph e leidenalg") from erro
+
+    superior = sparse.triu(A, format='coo')
+    pesos = np.where(superior.row == superior.col, superior.data / 2, superior.data)
+    g = ig.Graph(n=A.shape[0], edges=list(zip(superior.row.tolist(), superior.col.tolist())))
+    g.es['weight'] = pesos.tolist()
+    # leidenalg exige rótulos contíguos 0..c-1 (nós novos chegam com rótulos negativos)
+    inicial = (None if particao_inicial is None
+               else np.unique(np.asarray(particao_inicial), return_inverse=True)[1].tolist())
+    particao = leidenalg.find_partition(g, leidenalg.RBConfigurationVertexPartition, weights='weight',
+                                        resolution_parameter=resolucao, seed=random_state,
+                                        initial_membership=inicial)
+    return np.asarray(particao.membership)
+
+
+def best_partition_csr(A, nos, metodo='louvain', resolucao=1.0, random_state=None, particao=None):
+    """Equivalente a community_louvain.best_partition para a matriz CSR: retorna {nó: comunidade}"""
+    detectar = {'louvain': louvain_csr, 'leiden': leiden_csr}[metodo]
+    inicial = None if particao is None else [particao.get(no, -1 - i) for i, no in enumerate(nos)]
+    rotulos = detectar(A, resolucao, random_state, inicial)
+    return dict(zip(nos, rotulos.tolist()))
+
+
+def modularidade(particao, G):
+    """Modularidade da partição em G, calculada uma única vez por partição (cache em G.graph)"""
+    cache = G.graph.setdefault('modularidade', {})
+    chave = hash(tuple(particao.items()))
+    if chave not in cache:
+        A, nos = G.graph.get('csr') or grafo_para_csr(G)
+        cache[chave] = modularidade_csr(A, [particao[no] for no in nos])
+    return cache[chave]
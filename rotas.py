@@ -0,0 +1,176 @@
+import argparse
+from datetime import timedelta
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra as dijkstra_csgraph
+
+from cache_colunar import carregar_com_cache
+from distancias import RAIO_ADJACENCIA_KM
+from subgrafos import (ANOS, AREAS, ARQUIVO_CRIMES, TURNOS, invalidar_pesos, montar_subgrafo_a,
+                       montar_subgrafo_b, preparar_crimes)
+
+# Serviço de rotas críticas sobre o subgrafo B. As árvores de caminhos mínimos (custo 1/peso,
+# como em subgrafos.encontrar_rota) a partir de todos os nós da manhã são calculadas uma vez
+# com scipy.sparse.csgraph e guardadas: a tabela de todos os pares Manhã → Noite, a melhor
+# rota de um distrito e as k rotas mais críticas saem delas sem novo Dijkstra. Rotas que
+# evitam distritos usam uma visão restrita da matriz, com árvores guardadas por conjunto de
+# distritos evitados. Os caches são descartados quando o grafo é trocado ou quando a versão dos
+# pesos (G.graph['versao_pesos'], incrementada por subgrafos.invalidar_pesos) muda; cada
+# consulta só compara esse contador, e a matriz de custos é refeita apenas nesses casos.
+
+MAX_RESTRICOES_CACHE = 32  # Conjuntos de distritos evitados com árvores em cache
+
+
+def distrito_do_no(no):
+    """Distrito (subárea) de um nó 'subárea|turno' do subgrafo B"""
+    return no.rsplit('|', 1)[0]
+
+
+class ServicoRotas:
+    """Consultas de rotas Manhã → Noite em um subgrafo B (DiGraph com pesos 'weight')
+
+    Rotas são listas de nós e custos seguem encontrar_rota (menor custo = mais crítica). Em
+    empates de custo vale a ordem dos nós no grafo (origem, depois destino). Quem altera o
+    grafo no lugar deve chamar subgrafos.invalidar_pesos(G) (como fazem adicionar_transicoes e
+    incremental.atualizar_subgrafo_b) ou `invalidar()`; trocar o grafo com `atualizar(G)`
+    também descarta as árvores guardadas.
+    """
+
+    def __init__(self, G):
+        self.grafo = G
+        self.calculos = 0  # Execuções do Dijkstra (diagnóstico do cache)
+        self._versao = None
+        self._arvores = {}
+
+    def invalidar(self):
+        """Marca os pesos do grafo como alterados; a próxima consulta refaz a matriz de custos"""
+        invalidar_pesos(self.grafo)
+
+    def atualizar(self, G=None):
+        """Troca o grafo (opcional) e refaz a matriz de custos se ele mudou; retorna True nesse caso"""
+        if G is not None and G is not self.grafo:
+            self.grafo, self._versao = G, None
+        versao = self.grafo.graph.get('versao_pesos', 0)
+        if versao == self._versao:
+            return False
+
+        self._versao = versao
+        self._arvores = {}
+        self.nos = list(self.grafo.nodes)
+        self._distritos = np.array([distrito_do_no(no) for no in self.nos], dtype=object)
+        self._indice_origem = {distrito_do_no(no): k for k, no in enumerate(self.nos)
+                               if no.endswith(f"|{TURNOS[0]}")}
+        self._origens = np.array(list(self._indice_origem.values()), dtype=np.int64)
+        self._indice_destino = {distrito_do_no(no): k for k, no in enumerate(self.nos)
+                                if no.endswith(f"|{TURNOS[-1]}")}
+        self._destinos = np.array(list(self._indice_destino.values()), dtype=np.int64)
+        custos = nx.to_scipy_sparse_array(self.grafo, nodelist=self.nos, weight='weight', format='csr')
+        custos.data = 1 / custos.data
+        self._custos = custos
+        return True
+
+    def _arvores_para(self, evitar=()):
+        """(origens, distâncias, anteriores) das árvores de cada origem, sem os distritos em `evitar`"""
+        self.atualizar()
+        chave = frozenset(str(d) for d in evitar)
+        if chave in self._arvores:
+            self._arvores[chave] = self._arvores.pop(chave)  # Mais recente vai para o fim
+            return self._arvores[chave]
+
+        custos, origens = self._custos, self._origens
+        if chave:
+            manter = ~np.isin(self._distritos, list(chave))
+            filtro = sparse.diags(manter.astype(float))
+            custos = (filtro @ custos @ filtro).tocsr()
+            custos.eliminate_zeros()
+            origens = origens[manter[origens]]
+
+        if len(origens):
+            distancia, anterior = dijkstra_csgraph(custos, directed=True, indices=origens,
+                                                   return_predecessors=True)
+            self.calculos += 1
+        else:
+            distancia = np.full((0, len(self.nos)), np.inf)
+            anterior = np.full((0, len(self.nos)), -9999, dtype=np.int32)
+
+        if len(self._arvores) >= MAX_RESTRICOES_CACHE:
+            del self._arvores[next(iter(self._arvores))]
+        self._arvores[chave] = (origens, distancia, anterior)
+        return self._arvores[chave]
+
+    def _pares(self, distrito=None, evitar=()):
+        """Pares alcançáveis ordenados por custo: (árvores, linhas, destinos, custos)"""
+        arvores = origens, distancia, _ = self._arvores_para(evitar)
+        linhas = np.arange(len(origens))
+        if distrito is not None:
+            linhas = np.flatnonzero(origens == self._indice_origem.get(str(distrito), -1))
+
+        custos = distancia[np.ix_(linhas, self._destinos)]
+        linha, coluna = np.nonzero(np.isfinite(custos))
+        ordem = np.argsort(custos[linha, coluna], kind='stable')
+        return arvores, linhas[linha[ordem]], self._destinos[coluna[ordem]], custos[linha, coluna][ordem]
+
+    def _caminho(self, anterior, linha, destino):
+        caminho = [int(destino)]
+        while anterior[linha, caminho[-1]] >= 0:
+            caminho.append(int(anterior[linha, caminho[-1]]))
+        return [self.nos[k] for k in reversed(caminho)]
+
+    def tabela_rotas(self, evitar=()):
+        """DataFrame (origem, destino, custo) de todos os pares Manhã → Noite alcançáveis, por custo"""
+        (origens, _, _), linhas, destinos, custos = self._pares(evitar=evitar)
+        return pd.DataFrame({
+            'origem': [self.nos[k] for k in origens[linhas]],
+            'destino': [self.nos[k] for k in destinos],
+            'custo': custos,
+        })
+
+    def melhores_rotas(self, k=5, distrito=None, evitar=()):
+        """As k rotas mais críticas [(rota, custo)], de qualquer distrito ou só de `distrito`"""
+        (_, _, anterior), linhas, destinos, custos = self._pares(distrito, evitar)
+        return [(self._caminho(anterior, linha, destino), float(custo))
+                for linha, destino, custo in zip(linhas[:k], destinos[:k], custos[:k])]
+
+    def melhor_rota(self, distrito=None, evitar=()):
+        """(rota, custo) mais crítica a partir de `distrito` (ou de qualquer um); (None, inf) se não houver"""
+        rotas = self.melhores_rotas(1, distrito, evitar)
+        return rotas[0] if rotas else (None, float('inf'))
+
+    def rota_entre(self, origem, destino, evitar=()):
+        """(rota, custo) do distrito `origem` pela manhã ao distrito `destino` à noite"""
+        (_, _, anterior), linhas, destinos, custos = self._pares(origem, evitar)
+        alvo = np.flatnonzero(destinos == self._indice_destino.get(str(destino), -1))
+        if not len(alvo):
+            return None, float('inf')
+        k = alvo[0]
+        return self._caminho(anterior, linhas[k], destinos[k]), float(custos[k])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tabela de rotas críticas (Manhã → Noite) do subgrafo B")
+    parser.add_argument('--arquivo', default=ARQUIVO_CRIMES, help="CSV completo de crimes do LAPD")
+    parser.add_argument('--area', choices=AREAS, required=True)
+    parser.add_argument('--ano', type=int, choices=ANOS, required=True)
+    parser.add_argument('--distrito', help="distrito (Rpt Dist No) de partida; padrão: todos")
+    parser.add_argument('--evitar', nargs='+', default=[], help="distritos que a rota não pode atravessar")
+    parser.add_argument('--k', type=int, default=5, help="número de rotas listadas")
+    parser.add_argument('--janela-horas', type=float, default=24, help="janela temporal do subgrafo A")
+    parser.add_argument('--raio-km', type=float, default=RAIO_ADJACENCIA_KM, help="raio máximo entre subáreas")
+    args = parser.parse_args()
+
+    df = carregar_com_cache(args.arquivo, preparar_crimes)
+    df = df[(df['AREA NAME'] == args.area) & (df['ANO'] == args.ano)]
+    GA = montar_subgrafo_a(df, janela=timedelta(hours=args.janela_horas))
+    coordenadas = df.groupby("Rpt Dist No")[["LAT", "LON"]].mean().dropna()
+    GB, _ = montar_subgrafo_b(df, coordenadas, GA, args.raio_km, args.area)
+
+    servico = ServicoRotas(GB)
+    for rota, custo in servico.melhores_rotas(args.k, args.distrito, args.evitar):
+        print(f"{' → '.join(rota)} (Custo: {custo:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from Comunidades import (CAMINHOS_PERIODOS, LIMIAR_SIMILARIDADE, PESOS_SIMILARIDADE, RANDOM_SEED,
+                         arestas_similaridade, carregar_periodo, grafo_de_arestas, parametros_periodo,
+                         similaridade_pares)
+from cache_colunar import carregar_com_cache
+from codificacao import matriz_codigos
+
+# Grafo de similaridade aproximado (MinHash + LSH) para amostras muito grandes.
+# Cada crime vira um conjunto de tokens (atributo, código), repetidos conforme o peso do
+# atributo, de modo que a similaridade de Jaccard acompanha a similaridade ponderada.
+# Pares candidatos saem das faixas (bandas) das assinaturas MinHash; os pesos são calculados
+# de forma exata e nenhum nó fica com mais de k arestas (as mais fortes, ver limitar_grau).
+# Não é equivalente ao construtor exato: em 3.000 crimes sintéticos (1,29 milhão de arestas
+# exatas, k = 20) sobram ~26,8 mil arestas, a revocação simples é ~0,02 (o teto com grau k é
+# ~0,023) e a revocação top-k (avaliar_recall) é ~0,85; mudar bandas/linhas quase não a altera.
+
+BANDAS_LSH = 16
+LINHAS_POR_BANDA = 4
+VIZINHOS_POR_BANDA = 5  # Em cada balde, cada crime forma par com os próximos N (ordem aleatória)
+K_VIZINHOS = 20
+COLUNA_MOCODES = 'Mocodes'
+
+_DESLOCAMENTO_ATRIBUTO = 40
+_DESLOCAMENTO_CODIGO = 8
+
+
+def tokens_crimes(df, usar_mocodes=False):
+    """Matriz (linhas x tokens) int64 dos conjuntos de atributos de cada crime (-1 = sem token)
+
+    Cada atributo presente gera tantos tokens quanto o seu peso em PESOS_SIMILARIDADE. Com
+    `usar_mocodes`, cada código da coluna 'Mocodes' (separados por espaço) gera mais um token.
+    """
+    codigos = matriz_codigos(df, list(PESOS_SIMILARIDADE)).astype(np.int64)
+    blocos = []
+    for col, peso in enumerate(PESOS_SIMILARIDADE.values()):
+        base = (col << _DESLOCAMENTO_ATRIBUTO) + (codigos[:, col] << _DESLOCAMENTO_CODIGO)
+        for repeticao in range(peso):
+            blocos.append(np.where(codigos[:, col] >= 0, base + repeticao, -1))
+    tokens = np.column_stack(blocos)
+
+    if usar_mocodes:
+        if COLUNA_MOCODES not in df.columns:
+            raise ValueError(f"Coluna '{COLUNA_MOCODES}' ausente no DataFrame")
+        listas = df[COLUNA_MOCODES].astype('string').str.split()
+        mocodes = listas.set_axis(np.arange(len(df))).explode().dropna()
+        if len(mocodes):
+            linhas = mocodes.index.to_numpy()
+            codigo_mocode = pd.factorize(mocodes)[0].astype(np.int64)
+            coluna = mocodes.groupby(level=0).cumcount().to_numpy()
+            extra = np.full((len(df), coluna.max() + 1), -1, dtype=np.int64)
+            extra[linhas, coluna] = ((len(PESOS_SIMILARIDADE) << _DESLOCAMENTO_ATRIBUTO) +
+                                     (codigo_mocode << _DESLOCAMENTO_CODIGO))
+            tokens = np.hstack([tokens, extra])
+    return tokens
+
+
+def _unicos(valores):
+    """Valores distintos ordenados (ordenação + diferença, mais rápido que np.unique em arrays grandes)"""
+    valores = np.sort(valores)
+    distinto = np.ones(len(valores), dtype=bool)
+    distinto[1:] = valores[1:] != valores[:-1]
+    return valores[distinto]
+
+
+def assinaturas_minhash(tokens, num_hashes, random_state=None):
+    """Assinaturas MinHash (linhas x num_hashes) uint32 por hashing multiplicativo de 64 bits"""
+    rng = np.random.default_rng(random_state)
+    a = rng.integers(1, 2 ** 63, num_hashes, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, num_hashes, dtype=np.uint64)
+    validos = tokens >= 0
+    x = tokens.astype(np.uint64)
+    vazio = np.uint64(np.iinfo(np.uint32).max)
+
+    assinaturas = np.empty((len(tokens), num_hashes), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for h in range(num_hashes):
+            valores = (a[h] * x + b[h]) >> np.uint64(32)
+            assinaturas[:, h] = np.where(validos, valores, vazio).min(axis=1, initial=vazio)
+    return assinaturas
+
+
+def pares_lsh(assinaturas, bandas, linhas, vizinhos=VIZINHOS_POR_BANDA, random_state=None):
+    """Pares candidatos (i < j) que coincidem em alguma banda da assinatura
+
+    Em vez de todos os pares de cada balde (que explodiriam em tipos de crime frequentes),
+    os membros são embaralhados e cada um forma par com os `vizinhos` seguintes.
+    """
+    rng = np.random.default_rng(random_state)
+    n = len(assinaturas)
+    multiplicadores = rng.integers(1, 2 ** 63, linhas, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    fontes, destinos = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+
+    with np.errstate(over='ignore'):
+        for banda in range(bandas):
+            faixa = assinaturas[:, banda * linhas:(banda + 1) * linhas].astype(np.uint64)
+            chave = (faixa * multiplicadores).sum(axis=1)
+            ordem = np.lexsort((rng.random(n), chave))
+            chaves = chave[ordem]
+            for passo in range(1, vizinhos + 1):
+                mesmo = np.flatnonzero(chaves[passo:] == chaves[:-passo])
+                fontes.append(ordem[mesmo])
+                destinos.append(ordem[mesmo + passo])
+
+    i, j = np.concatenate(fontes), np.concatenate(destinos)
+    par = _unicos(np.minimum(i, j) * n + np.maximum(i, j))
+    return par // n, par % n
+
+
+def _postos(origem, peso, desempate):
+    """Posição de cada meia-aresta entre as da sua origem, por peso decrescente e depois `desempate`
+
+    `desempate` deve ser uma permutação de 0..m-1 (única por aresta); a ordem sai de um único
+    argsort sobre uma chave int64 (bem mais rápido que lexsort em arrays grandes).
+    """
+    maximo = int(peso.max(initial=0))
+    chave = (origem * (maximo + 1) + (maximo - peso)) * (int(desempate.max(initial=0)) + 1) + desempate
+    ordem = np.argsort(chave)
+    ordenada = origem[ordem]
+    contagem = np.bincount(ordenada)
+    inicio = np.cumsum(contagem) - contagem
+    posto = np.empty(len(origem), dtype=np.int64)
+    posto[ordem] = np.arange(len(origem)) - inicio[ordenada]
+    return posto
+
+
+def limitar_grau(i, j, w, k, random_state=None):
+    """Mantém no máximo k arestas por nó, preferindo as de maior peso (empates ao acaso)
+
+    As candidatas são as arestas entre as k de maior peso de alguma das pontas (no máximo
+    2 * n * k). Em cada rodada uma candidata é aceita se estiver entre as `livre` melhores
+    candidatas das duas pontas, onde `livre` é o que falta para k, e as pontas cheias saem
+    das candidatas. A candidata de maior peso sempre é aceita, então cada rodada avança.
+    """
+    rng = np.random.default_rng(random_state)
+    m = len(i)
+    desempate = rng.permutation(m)
+    origem = np.concatenate([i, j]).astype(np.int64)
+    posto = _postos(origem, np.tile(w, 2).astype(np.int64), np.tile(desempate, 2))
+    candidatas = np.flatnonzero((posto[:m] < k) | (posto[m:] < k))
+
+    livre = np.full(int(origem.max(initial=-1)) + 1, k, dtype=np.int64)
+    manter = np.zeros(m, dtype=bool)
+    while len(candidatas):
+        a, b = origem[candidatas], origem[m + candidatas]
+        posto = _postos(np.concatenate([a, b]), np.tile(w[candidatas], 2).astype(np.int64),
+                        np.tile(desempate[candidatas], 2))
+        aceita = (posto[:len(a)] < livre[a]) & (posto[len(a):] < livre[b])
+        manter[candidatas[aceita]] = True
+        livre -= np.bincount(np.concatenate([a[aceita], b[aceita]]), minlength=len(livre))
+        candidatas = candidatas[~aceita]
+        candidatas = candidatas[(livre[origem[candidatas]] > 0) & (livre[origem[m + candidatas]] > 0)]
+    return i[manter], j[manter], w[manter]
+
+
+def arestas_similaridade_aproximada(df, bandas=BANDAS_LSH, linhas=LINHAS_POR_BANDA,
+                                    vizinhos=VIZINHOS_POR_BANDA, k=K_VIZINHOS,
+                                    usar_mocodes=False, random_state=RANDOM_SEED):
+    """Arestas (i, j, peso) aproximadas, no mesmo formato de Comunidades.arestas_similaridade
+
+    Os pesos das arestas mantidas são exatos e respeitam LIMIAR_SIMILARIDADE; o grau de
+    cada nó fica limitado a k (e o número de arestas a n * k / 2).
+    """
+    assinaturas = assinaturas_minhash(tokens_crimes(df, usar_mocodes), bandas * linhas, random_state)
+    i, j = pares_lsh(assinaturas, bandas, linhas, vizinhos, random_state)
+    w = similaridade_pares(matriz_codigos(df, list(PESOS_SIMILARIDADE)), i, j)
+    manter = w >= LIMIAR_SIMILARIDADE
+    return limitar_grau(i[manter], j[manter], w[manter], k, random_state)
+
+
+def construir_grafo_aproximado(df, **parametros):
+    """Grafo de similaridade aproximado com os mesmos atributos de nó de construir_grafo"""
+    return grafo_de_arestas(df, *arestas_similaridade_aproximada(df, **parametros))
+
+
+def avaliar_recall(df, amostra=2000, random_state=RANDOM_SEED, **parametros):
+    """Compara o construtor aproximado com o exato em uma amostra de crimes
+
+    Retorna um dicionário com as contagens de arestas, a revocação (fração das arestas
+    exatas encontradas), a revocação ponderada pelos pesos, a revocação por peso, a
+    revocação top-k e o grau máximo do grafo aproximado. Com o grau limitado a k, a
+    revocação simples fica abaixo de n * k / arestas exatas; a top-k compara cada nó só
+    com os seus k vizinhos exatos mais fortes (conta os vizinhos aproximados com peso pelo
+    menos igual ao k-ésimo peso exato do nó, até min(k, grau exato)).
+    """
+    if len(df) > amostra:
+        df = df.sample(amostra, random_state=random_state)
+    df = df.reset_index(drop=True)
+    n = len(df)
+
+    ie, je, we = arestas_similaridade(df)
+    ia, ja, wa = arestas_similaridade_aproximada(df, random_state=random_state, **parametros)
+    encontrada = np.isin(np.minimum(ie, je) * n + np.maximum(ie, je),
+                         np.minimum(ia, ja) * n + np.maximum(ia, ja))
+
+    k = parametros.get('k', K_VIZINHOS)
+    origem = np.concatenate([ie, je]).astype(np.int64)
+    peso = np.tile(we, 2).astype(np.int64)
+    grau = np.bincount(origem, minlength=n)
+    alvo = np.minimum(grau, k)
+    posto = _postos(origem, peso, np.arange(len(origem)))
+    limite = np.zeros(n, dtype=np.int64)
+    ultimo = posto == alvo[origem] - 1
+    limite[origem[ultimo]] = peso[ultimo]
+    origem_aproximada = np.concatenate([ia, ja]).astype(np.int64)
+    peso_aproximado = np.tile(wa, 2).astype(np.int64)
+    forte = peso_aproximado >= limite[origem_aproximada]
+    achadas = np.minimum(np.bincount(origem_aproximada[forte], minlength=n), alvo)
+
+    pesos = pd.DataFrame({'peso': we, 'encontrada': encontrada})
+    return {
+        'crimes': n,
+        'arestas_exatas': int(len(we)),
+        'arestas_aproximadas': int(len(ia)),
+        'recall': float(encontrada.mean()) if len(we) else 1.0,
+        'recall_ponderado': float(we[encontrada].sum() / we.sum()) if len(we) else 1.0,
+        'recall_por_peso': {int(p): float(r) for p, r in pesos.groupby('peso')['encontrada'].mean().items()},
+        'recall_top_k': float(achadas.sum() / alvo.sum()) if alvo.sum() else 1.0,
+        'grau_maximo': int(np.bincount(np.concatenate([ia, ja]), minlength=n).max(initial=0)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Revocação do grafo de similaridade aproximado (MinHash/LSH)")
+    parser.add_argument('--periodo', choices=list(CAMINHOS_PERIODOS), default=list(CAMINHOS_PERIODOS)[0])
+    parser.add_argument('--amostra', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=K_VIZINHOS)
+    parser.add_argument('--bandas', type=int, default=BANDAS_LSH)
+    parser.add_argument('--linhas', type=int, default=LINHAS_POR_BANDA)
+    args = parser.parse_args()
+
+    df = carregar_com_cache(CAMINHOS_PERIODOS[args.periodo], carregar_periodo, parametros_periodo())
+    relatorio = avaliar_recall(df, args.amostra, k=args.k, bandas=args.bandas, linhas=args.linhas)
+    for chave, valor in relatorio.items():
+        print(f"{chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
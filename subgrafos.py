@@ -1,9 +1,26 @@
+import argparse
+import heapq
+import json
+from itertools import count
+from pathlib import Path
+
 import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
 from datetime import timedelta
-from math import radians, sin, cos, sqrt, atan2
 import numpy as np
+from scipy.sparse.csgraph import dijkstra as dijkstra_csgraph
+
+from cache_colunar import carregar_com_cache
+from codificacao import codificar
+from distancias import RAIO_ADJACENCIA_KM, adjacencia_raio, haversine
+from instrumentacao import Execucao, etapa
+
+ARQUIVO_CRIMES = "Cenário 6 - Crimes_2020-2024 Los Angeles.csv"
+AREAS = ['77th Street', 'Central', 'Devonshire', 'Foothill', 'Harbor', 'Hollenbeck', 'Hollywood',
+         'Mission', 'Newton', 'Northeast', 'North Hollywood', 'Olympic', 'Pacific', 'Rampart',
+         'Southeast', 'Southwest', 'Topanga', 'Van Nuys', 'West LA', 'West Valley', 'Wilshire']
+ANOS = list(range(2020, 2025))
 
 # Detecta o turno com base na hora
 def classificar_turno(hora_str):
@@ -17,17 +34,76 @@ def classificar_turno(hora_str):
     except:
         return 'Noite'
 
-# Cálculo de distância geográfica para as coordenadas
+# Lê o CSV completo e deriva datas, turnos e coordenadas numéricas
+def preparar_crimes(arq):
+    df = pd.read_csv(arq, sep=";", encoding="latin1", on_bad_lines="skip")
+    df['DATE OCC'] = pd.to_datetime(df['DATE OCC'], errors='coerce')
+    df['ANO'] = df['DATE OCC'].dt.year
+    df['MES'] = df['DATE OCC'].dt.month
+    df['Turno'] = df['TIME OCC'].apply(classificar_turno).astype('category')
+    df['LAT'] = pd.to_numeric(df['LAT'], errors='coerce')
+    df['LON'] = pd.to_numeric(df['LON'], errors='coerce')
+    return codificar(df)
+
+# Cálculo de distância geográfica para as coordenadas (haversine)
 def calcular_distancia(lat1, lon1, lat2, lon2):
-    R = 6371
-    dlat, dlon = radians(lat2 - lat1), radians(lon2 - lon1)
-    a = sin(dlat/2)*2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)*2
-    return 2 * R * atan2(sqrt(a), sqrt(1 - a))
+    return float(haversine(lat1, lon1, lat2, lon2))
+
+# Crimes mais frequentes, que formam os nós do subgrafo A
+def crimes_principais(df, limite=10):
+    contagem = df['Crm Cd Desc'].value_counts()
+    return list(contagem[contagem > 0].nlargest(limite).index)
+
+# Conta os pares (c1, c2) em que c2 ocorre no mesmo distrito até `janela` depois de c1.
+# Usa arrays ordenados + searchsorted por distrito e somas acumuladas por tipo de crime,
+# retornando a matriz densa crimes x crimes.
+def contar_pares_janela(df, crimes, janela=timedelta(hours=24)):
+    k = len(crimes)
+    dados = df[df['Crm Cd Desc'].isin(crimes) & df['DATE OCC'].notna() & df['Rpt Dist No'].notna()]
+    codigo = pd.Index(crimes).get_indexer(dados['Crm Cd Desc'].astype(object)).astype(np.int64)
+    distrito = pd.factorize(dados['Rpt Dist No'])[0]
+    tempo = dados['DATE OCC'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+    ordem = np.lexsort((tempo, distrito))
+    codigo, distrito, tempo = codigo[ordem], distrito[ordem], tempo[ordem]
+    n = len(codigo)
+
+    # Janela (d1, d1 + janela] de cada evento dentro do seu distrito
+    inicio = np.empty(n, dtype=np.int64)
+    fim = np.empty(n, dtype=np.int64)
+    limites = np.r_[0, np.flatnonzero(np.diff(distrito)) + 1, n]
+    janela_ns = pd.Timedelta(janela).value
+    for a, b in zip(limites[:-1], limites[1:]):
+        t = tempo[a:b]
+        inicio[a:b] = a + np.searchsorted(t, t, side='right')
+        fim[a:b] = a + np.searchsorted(t, t + janela_ns, side='right')
+
+    # Quantidade de cada tipo de crime na janela de cada evento
+    acumulado = np.zeros((n + 1, k), dtype=np.int32)
+    if n:
+        np.cumsum(np.eye(k, dtype=np.int32)[codigo], axis=0, out=acumulado[1:])
+    na_janela = acumulado[fim] - acumulado[inicio]
+
+    matriz = np.zeros((k, k), dtype=np.int64)
+    np.add.at(matriz, codigo, na_janela)
+    return matriz
 
 # Subgrafo A padrão temporal entre crimes comuns
-def montar_subgrafo_a(df, limite=10):
+def montar_subgrafo_a(df, limite=10, janela=timedelta(hours=24)):
+    G = nx.DiGraph()
+    principais = crimes_principais(df, limite)
+    for crime in principais:
+        G.add_node(crime)
+
+    matriz = contar_pares_janela(df, principais, janela)
+    for a, b in zip(*np.nonzero(matriz)):
+        G.add_edge(principais[a], principais[b], weight=int(matriz[a, b]))
+    return G
+
+# Versão original (laço par a par), mantida como referência para validação
+def montar_subgrafo_a_referencia(df, limite=10):
     G = nx.DiGraph()
-    principais = df['Crm Cd Desc'].value_counts().nlargest(limite).index
+    principais = crimes_principais(df, limite)
     dados = df[df['Crm Cd Desc'].isin(principais)].sort_values(['Rpt Dist No', 'DATE OCC'])
 
     for crime in principais:
@@ -46,18 +122,117 @@ def montar_subgrafo_a(df, limite=10):
                     break
     return G
 
-# Subgrafo B transição turno-espacial entre crimes
-def montar_subgrafo_b(df, coords, ref):
+TURNOS = ['Manhã', 'Tarde', 'Noite']
+
+# Nós (subárea|turno) do subgrafo B e suas posições para o desenho
+def nos_subgrafo_b(coords):
     G, pos = nx.DiGraph(), {}
-    turnos = ['Manhã', 'Tarde', 'Noite']
     desloca_lat, desloca_lon = {'Manhã': 30, 'Tarde': 15, 'Noite': 0}, 1.5
 
     for idx, sub in enumerate(sorted(coords.index)):
         lat, lon = coords.loc[sub]
-        for t in turnos:
+        for t in TURNOS:
             nodo = f"{sub}|{t}"
             pos[nodo] = (lon + desloca_lon * idx, lat + desloca_lat[t])
             G.add_node(nodo)
+    return G, pos
+
+# Matriz de pesos crime x crime vinda do subgrafo A (1 quando não há aresta).
+# A última linha/coluna corresponde a crimes ausentes (NaN).
+def matriz_pesos(ref, crimes):
+    indice = {c: i for i, c in enumerate(crimes)}
+    W = np.ones((len(crimes) + 1, len(crimes) + 1), dtype=np.int64)
+    for u, v, dados in ref.edges(data=True):
+        if u in indice and v in indice:
+            W[indice[u], indice[v]] = dados['weight']
+    return W
+
+# Contagens de transições entre turnos consecutivos, somadas sobre as datas: uma linha por
+# (turno1, sub1, sub2, crime1, crime2) com n = número de pares de crimes. Agrega os crimes por
+# (data, turno, subárea, crime) e junta turnos consecutivos pela data, então o custo depende do
+# número de grupos distintos e não do número de pares de crimes.
+# A regra de raio usa a matriz de distâncias da área, calculada uma única vez.
+def contar_transicoes(df, coords, raio_km=RAIO_ADJACENCIA_KM, area=None):
+    perto = adjacencia_raio(coords, raio_km, area).to_numpy()
+
+    validos = df['DATE OCC'].notna() & df['Rpt Dist No'].isin(coords.index) & df['Turno'].isin(TURNOS)
+    dados = df[validos]
+    codigo, crimes = pd.factorize(dados['Crm Cd Desc'])
+    grupos = pd.DataFrame({
+        'data': dados['DATE OCC'].dt.normalize().to_numpy(),
+        'turno': dados['Turno'].astype(str).to_numpy(),
+        'sub': dados['Rpt Dist No'].to_numpy(),
+        'crime': codigo,
+    }).groupby(['data', 'turno', 'sub', 'crime']).size().rename('n').reset_index()
+
+    colunas = ['turno1', 'sub1', 'sub2', 'crime1', 'crime2', 'n']
+    tipos = {'turno1': str, 'sub1': grupos['sub'].dtype, 'sub2': grupos['sub'].dtype,
+             'crime1': np.int64, 'crime2': np.int64, 'n': np.int64}
+    partes = [pd.DataFrame({col: pd.Series(dtype=tipo) for col, tipo in tipos.items()})]
+    for t1, t2 in zip(TURNOS[:-1], TURNOS[1:]):
+        pares = grupos[grupos['turno'] == t1].merge(grupos[grupos['turno'] == t2], on='data', suffixes=('1', '2'))
+        if pares.empty:
+            continue
+        pares = pares[perto[coords.index.get_indexer(pares['sub1']), coords.index.get_indexer(pares['sub2'])]]
+        pares = pares.assign(n=pares['n1'] * pares['n2'])
+        partes.append(pares.groupby(['sub1', 'sub2', 'crime1', 'crime2'])['n'].sum().reset_index().assign(turno1=t1))
+
+    # Códigos de crime voltam a ser rótulos (None para crimes ausentes)
+    transicoes = pd.concat([p for p in partes if len(p)] or partes, ignore_index=True)
+    rotulos = np.array(list(crimes) + [None], dtype=object)
+    for col in ['crime1', 'crime2']:
+        transicoes[col] = rotulos[transicoes[col].to_numpy(dtype=np.int64)]
+    return transicoes[colunas]
+
+# Peso de cada linha de transições: n * peso(crime1, crime2) do subgrafo A
+def pesos_transicoes(transicoes, ref):
+    codigo, crimes = pd.factorize(pd.concat([transicoes['crime1'], transicoes['crime2']]))
+    codigo = np.where(codigo < 0, len(crimes), codigo)
+    W = matriz_pesos(ref, list(crimes))
+    n = len(transicoes)
+    return transicoes['n'].to_numpy(dtype=np.int64) * W[codigo[:n], codigo[n:]]
+
+# Contador em G.graph['versao_pesos'] incrementado por quem altera nós, arestas ou pesos do
+# grafo; consumidores com caches (ex.: rotas.ServicoRotas) só comparam o contador
+def invalidar_pesos(G):
+    G.graph['versao_pesos'] = G.graph.get('versao_pesos', 0) + 1
+    return G
+
+# Arestas subárea|turno → subárea|turno seguinte: soma de n * peso(crime1, crime2) do subgrafo A
+def adicionar_transicoes(G, transicoes, ref):
+    peso = pesos_transicoes(transicoes, ref)
+    seguinte = dict(zip(TURNOS[:-1], TURNOS[1:]))
+    somas = transicoes.assign(peso=peso).groupby(['turno1', 'sub1', 'sub2'])['peso'].sum()
+    for (t1, s1, s2), p in somas.items():
+        G.add_edge(f"{s1}|{t1}", f"{s2}|{seguinte[t1]}", weight=int(p))
+    return invalidar_pesos(G)
+
+# Emite as arestas do subgrafo B em lotes para um destino direcionado com agregação 'soma'
+# (ex.: ArestasEmDisco(..., nao_direcionado=False)); os índices são posições em `nos`.
+def emitir_transicoes(destino, transicoes, ref, nos, tamanho_lote=1_000_000):
+    indice = pd.Index(nos)
+    seguinte = dict(zip(TURNOS[:-1], TURNOS[1:]))
+    for inicio in range(0, len(transicoes), tamanho_lote):
+        lote = transicoes.iloc[inicio:inicio + tamanho_lote]
+        origem = lote['sub1'].astype(str) + '|' + lote['turno1']
+        final = lote['sub2'].astype(str) + '|' + lote['turno1'].map(seguinte)
+        i, j = indice.get_indexer(origem), indice.get_indexer(final)
+        if (i < 0).any() or (j < 0).any():
+            desconhecidos = sorted(set(origem[i < 0]) | set(final[j < 0]))
+            raise ValueError(f"Transições com nós fora de `nos`: {desconhecidos[:5]}")
+        destino.adicionar(i, j, pesos_transicoes(lote, ref))
+    return destino
+
+# Subgrafo B transição turno-espacial entre crimes
+def montar_subgrafo_b(df, coords, ref, raio_km=RAIO_ADJACENCIA_KM, area=None):
+    G, pos = nos_subgrafo_b(coords)
+    adicionar_transicoes(G, contar_transicoes(df, coords, raio_km, area), ref)
+    return G, pos
+
+# Versão original (produto cartesiano das linhas), mantida como referência para validação
+def montar_subgrafo_b_referencia(df, coords, ref):
+    G, pos = nos_subgrafo_b(coords)
+    turnos = TURNOS
 
     for data_ref, sub_df in df.groupby(df['DATE OCC'].dt.date):
         for t1, t2 in zip(turnos[:-1], turnos[1:]):
@@ -73,25 +248,36 @@ def montar_subgrafo_b(df, coords, ref):
                             G.add_edge(n1, n2, weight=atual + peso)
     return G, pos
 
-# Implementação do Dijkstra
+# Implementação do Dijkstra com heap binário (entradas obsoletas são descartadas ao sair do heap)
 def dijkstra(G, origem):
+    return dijkstra_multiorigem(G, [origem])
+
+# Dijkstra a partir de várias origens de custo zero, equivalente a uma super-origem virtual.
+# Empates de custo ficam com a origem que aparece primeiro na lista.
+def dijkstra_multiorigem(G, origens):
     custo = {v: float('inf') for v in G.nodes}
     rota = {v: None for v in G.nodes}
-    custo[origem] = 0
+    rotulo = {}
+    desempate = count()
+    heap = []
+    for ordem, o in enumerate(origens):
+        if o not in rotulo:
+            custo[o], rotulo[o] = 0, (0, ordem)
+            heap.append((0, ordem, next(desempate), o))
+    heapq.heapify(heap)
     visitados = set()
 
-    while len(visitados) < len(G):
-        nao_visitados = {v: custo[v] for v in G if v not in visitados}
-        if not nao_visitados:
-            break
-        atual = min(nao_visitados, key=nao_visitados.get)
+    while heap:
+        custo_atual, ordem, _, atual = heapq.heappop(heap)
+        if atual in visitados:
+            continue
         visitados.add(atual)
-        for vizinho in G.successors(atual):
-            peso = G[atual][vizinho]['weight']
-            custo_novo = custo[atual] + (1 / peso)
-            if custo_novo < custo[vizinho]:
-                custo[vizinho] = custo_novo
+        for vizinho, dados in G.adj[atual].items():
+            novo = (custo_atual + (1 / dados['weight']), ordem)
+            if novo < rotulo.get(vizinho, (float('inf'), 0)):
+                custo[vizinho], rotulo[vizinho] = novo[0], novo
                 rota[vizinho] = atual
+                heapq.heappush(heap, (*novo, next(desempate), vizinho))
 
     return custo, rota
 
@@ -104,12 +290,30 @@ def reconstruir_caminho(rota, origem, destino):
     caminho.reverse()
     return caminho if caminho[0] == origem else []
 
-# Busca o caminho com maior criminalidade entre manhã, tarde e noite
-def encontrar_rota(G):
+# Origem (raiz da árvore de caminhos) que alcança o destino
+def origem_da_rota(rota, destino):
+    atual = destino
+    while rota[atual] is not None:
+        atual = rota[atual]
+    return atual
+
+# Busca o caminho com maior criminalidade entre manhã, tarde e noite.
+# Com multiorigem=True resolve todos os pares Manhã→Noite em uma única execução do Dijkstra.
+def encontrar_rota(G, multiorigem=True):
     inicio = [n for n in G.nodes if '|Manhã' in n]
     fim = [n for n in G.nodes if '|Noite' in n]
     melhor, custo_min = None, float('inf')
 
+    if multiorigem:
+        custos, rotas = dijkstra_multiorigem(G, inicio)
+        ordem = {o: i for i, o in enumerate(inicio)}
+        alcancados = [d for d in fim if custos[d] < float('inf')]
+        if alcancados:
+            d = min(alcancados, key=lambda d: (custos[d], ordem[origem_da_rota(rotas, d)]))
+            o = origem_da_rota(rotas, d)
+            melhor, custo_min = reconstruir_caminho(rotas, o, d), custos[d]
+        return melhor, custo_min
+
     for o in inicio:
         custos, rotas = dijkstra(G, o)
         for d in fim:
@@ -119,8 +323,38 @@ def encontrar_rota(G):
 
     return melhor, custo_min
 
+# Mesma busca de encontrar_rota sobre a matriz CSR direcionada (pesos do subgrafo B, por
+# exemplo lidos de ArestasEmDisco) com scipy.sparse.csgraph; `nos` dá o rótulo de cada índice.
+# Em empates de custo a rota escolhida pode diferir da de encontrar_rota.
+def encontrar_rota_csr(A, nos):
+    inicio = [k for k, n in enumerate(nos) if '|Manhã' in n]
+    fim = np.array([k for k, n in enumerate(nos) if '|Noite' in n], dtype=np.int64)
+    if not inicio or not len(fim):
+        return None, float('inf')
+
+    custos = A.tocsr(copy=True)
+    custos.data = 1 / custos.data
+    distancia, anterior, _ = dijkstra_csgraph(custos, directed=True, indices=inicio, min_only=True,
+                                              return_predecessors=True)
+    if not np.isfinite(distancia[fim]).any():
+        return None, float('inf')
+
+    destino = int(fim[np.argmin(distancia[fim])])
+    caminho = [destino]
+    while anterior[caminho[-1]] >= 0:
+        caminho.append(int(anterior[caminho[-1]]))
+    return [nos[k] for k in reversed(caminho)], float(distancia[destino])
+
 # Plotagem dos grafos
-def mostrar_grafo_final(G, pos, rota, titulo):
+# Exibe a figura atual ou, com `arquivo`, salva em disco (modo sem interface)
+def finalizar_figura(arquivo=None):
+    if arquivo:
+        plt.savefig(arquivo, dpi=150, bbox_inches='tight')
+        plt.close()
+    else:
+        plt.show()
+
+def mostrar_grafo_final(G, pos, rota, titulo, arquivo=None):
     plt.figure(figsize=(20, 12))
     cores = ['red' if rota and (u, v) in zip(rota, rota[1:]) else 'gray' for u, v in G.edges()]
     nx.draw(G, pos, node_color='#b3d9ff', edge_color=cores, with_labels=True,
@@ -128,21 +362,21 @@ def mostrar_grafo_final(G, pos, rota, titulo):
     plt.title(titulo + " \U0001F5FA")
     plt.axis('off')
     plt.tight_layout()
-    plt.show()
+    finalizar_figura(arquivo)
 
-def mostrar_subgrafo_a(G, titulo):
+def mostrar_subgrafo_a(G, titulo, arquivo=None):
     layout = nx.spring_layout(G, seed=0)
     plt.figure(figsize=(14, 10))
     pesos = np.array([G[u][v]['weight'] for u, v in G.edges()])
-    esc = np.clip((pesos / pesos.max()) * 5, 1, 5) if len(pesos) > 0 else []
+    esc = np.clip((pesos / pesos.max()) * 5, 1, 5).tolist() if len(pesos) > 0 else []
     nx.draw(G, layout, with_labels=True, node_color='#c6e2ff', node_size=1400,
-            edge_color='gray', width=esc.tolist(), arrows=True, arrowstyle='-|>', arrowsize=15)
+            edge_color='gray', width=esc, arrows=True, arrowstyle='-|>', arrowsize=15)
     plt.title(titulo)
     plt.axis('off')
     plt.tight_layout()
-    plt.show()
+    finalizar_figura(arquivo)
 
-def mostrar_subgrafo_b(G, pos, titulo):
+def mostrar_subgrafo_b(G, pos, titulo, arquivo=None):
     plt.figure(figsize=(20, 12))
     pesos = [d['weight'] for _, _, d in G.edges(data=True)]
     larg = [max(1, (p / max(pesos)) * 5) for p in pesos] if pesos else []
@@ -151,31 +385,116 @@ def mostrar_subgrafo_b(G, pos, titulo):
     plt.title(titulo)
     plt.axis('off')
     plt.tight_layout()
-    plt.show()
+    finalizar_figura(arquivo)
+
+# Monta os subgrafos A e B e a rota crítica de uma área em um ano.
+# Se `tempos` (dict) for informado, registra a duração de cada etapa em segundos.
+def analisar_area_ano(df, area, ano, janela=timedelta(hours=24), raio_km=RAIO_ADJACENCIA_KM, tempos=None):
+    tempos = {} if tempos is None else tempos
+    with etapa('filtro', area=area, ano=ano) as registro:
+        df_filtrado = df[(df['AREA NAME'] == area) & (df['ANO'] == ano)].copy()
+        registro['linhas'] = len(df_filtrado)
+    tempos['filtro'] = registro['segundos']
+
+    with etapa('subgrafo_a', area=area, ano=ano) as registro:
+        GA = montar_subgrafo_a(df_filtrado, janela=janela)
+        registro.update(nos=GA.number_of_nodes(), arestas=GA.number_of_edges())
+    tempos['subgrafo_a'] = registro['segundos']
+
+    with etapa('subgrafo_b', area=area, ano=ano) as registro:
+        coordenadas = df_filtrado.groupby("Rpt Dist No")[["LAT", "LON"]].mean().dropna()
+        GB, pos = montar_subgrafo_b(df_filtrado, coordenadas, GA, raio_km, area)
+        registro.update(nos=GB.number_of_nodes(), arestas=GB.number_of_edges())
+    tempos['subgrafo_b'] = registro['segundos']
+
+    with etapa('rota', area=area, ano=ano) as registro:
+        rota, custo = encontrar_rota(GB)
+        registro.update(tamanho_rota=len(rota or []), custo=custo if np.isfinite(custo) else None)
+    tempos['rota'] = registro['segundos']
+    return GA, GB, pos, rota, custo
+
+# Grava grafos (GraphML), figuras (PNG) e rota/custo/tempos (JSON) de uma área e ano
+def salvar_resultados(saida, area, ano, GA, GB, pos, rota, custo, tempos):
+    saida = Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    prefixo = saida / f"{area.replace(' ', '_')}_{ano}"
+
+    with etapa('gravacao', area=area, ano=ano) as registro:
+        nx.write_graphml(GA, f"{prefixo}_subgrafo_a.graphml")
+        nx.write_graphml(GB, f"{prefixo}_subgrafo_b.graphml")
+        mostrar_subgrafo_a(GA, f"Crimes Encadeados – {area} ({ano})", f"{prefixo}_subgrafo_a.png")
+        mostrar_subgrafo_b(GB, pos, f"Transições Temporais – {area} ({ano})", f"{prefixo}_subgrafo_b.png")
+        mostrar_grafo_final(GB, pos, rota, f"Caminho Crítico – {area} ({ano})", f"{prefixo}_rota.png")
+    tempos['gravacao'] = registro['segundos']
+
+    resultado = {
+        'area': area,
+        'ano': ano,
+        'rota': rota,
+        'custo': custo if custo != float('inf') else None,
+        'nos_a': GA.number_of_nodes(),
+        'arestas_a': GA.number_of_edges(),
+        'nos_b': GB.number_of_nodes(),
+        'arestas_b': GB.number_of_edges(),
+        'tempos': tempos,
+    }
+    with open(f"{prefixo}_resultado.json", 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return resultado
+
+def ler_argumentos(argv=None):
+    parser = argparse.ArgumentParser(description="Subgrafos temporais (A), espaciais (B) e rota crítica por área e ano")
+    parser.add_argument('--arquivo', default=ARQUIVO_CRIMES, help="CSV completo de crimes do LAPD")
+    parser.add_argument('--areas', nargs='+', help="áreas a analisar ('todas' para as 21 áreas)")
+    parser.add_argument('--anos', nargs='+', type=int, help="anos a analisar (padrão: 2020 a 2024)")
+    parser.add_argument('--janela-horas', type=float, default=24, help="janela temporal do subgrafo A")
+    parser.add_argument('--raio-km', type=float, default=RAIO_ADJACENCIA_KM, help="raio máximo entre subáreas no subgrafo B")
+    parser.add_argument('--headless', action='store_true', help="não abre janelas; grava os resultados em --saida")
+    parser.add_argument('--saida', default='resultados', help="diretório de saída do modo headless")
+    parser.add_argument('--relatorio', default='relatorio_subgrafos.json',
+                        help="relatório JSON de tempos, memória, contagens e erros por etapa")
+    parser.add_argument('--perfilar', action='store_true', help="grava um cProfile (.prof) por etapa em perfis/")
+    args = parser.parse_args(argv)
+    # O modo interativo pergunta a área pelo input(); sem interface ela precisa vir da linha de comando
+    if args.headless and not args.areas:
+        parser.error("--headless requer --areas (use '--areas todas' para as 21 áreas)")
+    return args
 
-print("\nÁreas disponíveis:\n 77th Street, Central, Devonshire, Foothill, Harbor, Hollenbeck, Hollywood, Mission, Newton, Northeast, North Hollywood, Olympic, Pacific, Rampart, Southeast, Southwest, Topanga, Van Nuys, West LA, West Valley, Wilshire")
+def main(argv=None):
+    args = ler_argumentos(argv)
 
-arq = "Cenário 6 - Crimes_2020-2024 Los Angeles.csv"
-area = input("\nQual área você quer analisar? ")
-ano = int(input("Ano (2020 a 2024): "))
+    # Sem áreas na linha de comando, mantém o modo interativo
+    if args.areas:
+        areas = AREAS if args.areas == ['todas'] else args.areas
+        anos = args.anos or ANOS
+    else:
+        print(f"\nÁreas disponíveis:\n {', '.join(AREAS)}")
+        areas = [input("\nQual área você quer analisar? ")]
+        anos = args.anos or [int(input("Ano (2020 a 2024): "))]
 
-df = pd.read_csv(arq, sep=";", encoding="latin1", on_bad_lines="skip")
-df['DATE OCC'] = pd.to_datetime(df['DATE OCC'], errors='coerce')
-df['ANO'] = df['DATE OCC'].dt.year
-df['MES'] = df['DATE OCC'].dt.month
-df['Turno'] = df['TIME OCC'].apply(classificar_turno)
-df['LAT'] = pd.to_numeric(df['LAT'], errors='coerce')
-df['LON'] = pd.to_numeric(df['LON'], errors='coerce')
+    if args.headless:
+        plt.switch_backend('Agg')
 
-df_filtrado = df[(df['AREA NAME'] == area) & (df['ANO'] == ano)].copy()
+    with Execucao('subgrafos', args.relatorio, args.perfilar):
+        with etapa('carga') as registro:
+            df = carregar_com_cache(args.arquivo, preparar_crimes)
+            registro['linhas'] = len(df)
+        tempo_carga = registro['segundos']
 
-GA = montar_subgrafo_a(df_filtrado)
-mostrar_subgrafo_a(GA, f"Crimes Encadeados – {area} ({ano})")
+        for area in areas:
+            for ano in anos:
+                tempos = {'carga': tempo_carga}
+                GA, GB, pos, rota, custo = analisar_area_ano(df, area, ano, timedelta(hours=args.janela_horas),
+                                                             args.raio_km, tempos)
+                print(f"\n{area} ({ano}) - Rota crítica: {rota} (Custo: {custo:.2f})")
 
-coordenadas = df_filtrado.groupby("Rpt Dist No")[["LAT", "LON"]].mean().dropna()
-GB, pos = montar_subgrafo_b(df_filtrado, coordenadas, GA)
-mostrar_subgrafo_b(GB, pos, f"Transições Temporais – {area} ({ano})")
+                if args.headless:
+                    salvar_resultados(args.saida, area, ano, GA, GB, pos, rota, custo, tempos)
+                    print("Tempos (s): " + ", ".join(f"{nome}={t:.3f}" for nome, t in tempos.items()))
+                else:
+                    mostrar_subgrafo_a(GA, f"Crimes Encadeados – {area} ({ano})")
+                    mostrar_subgrafo_b(GB, pos, f"Transições Temporais – {area} ({ano})")
+                    mostrar_grafo_final(GB, pos, rota, f"Caminho Crítico – {area} ({ano})")
 
-rota, custo = encontrar_rota(GB)
-print(f"\nRota crítica: {rota} (Custo: {custo:.2f})")
-mostrar_grafo_final(GB, pos, rota, f"Caminho Crítico – {area} ({ano})")
+if __name__ == "__main__":
+    main()
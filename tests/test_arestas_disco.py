@@ -0,0 +1,91 @@
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+import subgrafos
+from arestas_disco import ArestasEmDisco
+from Comunidades import arestas_similaridade, emitir_arestas_similaridade
+from louvain_esparso import matriz_adjacencia
+
+from test_similaridade_aproximada import _crimes as _crimes_periodo
+
+
+def test_agrega_pares_repetidos(tmp_path):
+    with ArestasEmDisco(tmp_path, baldes=4) as destino:
+        destino.adicionar([0, 1, 2], [1, 0, 2], [1.0, 2.0, 5.0])
+        destino.adicionar([0], [1], 4.0)
+        destino.consolidar()
+        A = destino.csr(3).toarray()
+    assert A[0, 1] == A[1, 0] == 7.0
+    assert A[2, 2] == 10.0  # laço com o dobro do peso, como em louvain_esparso
+
+
+def test_descarta_baldes_de_execucao_anterior(tmp_path):
+    # Execução interrompida antes de consolidar deixa baldes no diretório
+    with ArestasEmDisco(tmp_path, baldes=4) as anterior:
+        anterior.adicionar([0, 1], [1, 2], [9.0, 9.0])
+
+    with ArestasEmDisco(tmp_path, baldes=4) as destino:
+        destino.adicionar([0], [1], [1.0])
+        destino.consolidar()
+        arestas = destino.arestas()
+        assert len(arestas) == 1
+        assert arestas['w'][0] == 1.0
+
+
+def test_emitir_transicoes_rejeita_nos_desconhecidos(tmp_path):
+    transicoes = pd.DataFrame({'turno1': ['Manhã'], 'sub1': [101], 'sub2': [999],
+                               'crime1': ['ROBBERY'], 'crime2': ['ROBBERY'], 'n': [1]})
+    nos = [f"101|{t}" for t in subgrafos.TURNOS]
+    with ArestasEmDisco(tmp_path, nao_direcionado=False) as destino:
+        with pytest.raises(ValueError, match='999'):
+            subgrafos.emitir_transicoes(destino, transicoes, subgrafos.nx.DiGraph(), nos)
+
+
+def _crimes_area(n, seed=0, distritos=8):
+    rng = np.random.default_rng(seed)
+    distrito = rng.integers(101, 101 + distritos, n)
+    centro = {d: (34.0 + rng.uniform(-.05, .05), -118.3 + rng.uniform(-.05, .05)) for d in range(101, 101 + distritos)}
+    hora = rng.integers(0, 24, n)
+    turno = np.select([(hora >= 6) & (hora < 12), (hora >= 12) & (hora < 18)], ['Manhã', 'Tarde'], 'Noite')
+    return subgrafos.codificar(pd.DataFrame({
+        'Crm Cd Desc': rng.choice(['ROBBERY', 'BURGLARY', 'ARSON', 'VANDALISM'], n, p=[.4, .3, .2, .1]),
+        'DATE OCC': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 10 * 24, n), 'h'),
+        'Rpt Dist No': distrito,
+        'Turno': pd.Categorical(turno, categories=subgrafos.TURNOS),
+        'LAT': [centro[d][0] for d in distrito],
+        'LON': [centro[d][1] for d in distrito],
+    }))
+
+
+def test_similaridade_em_disco_igual_a_matriz(tmp_path):
+    df = _crimes_periodo(400)
+    with ArestasEmDisco(tmp_path, agregacao='maximo', baldes=4) as destino:
+        emitir_arestas_similaridade(df, destino, tamanho_lote=1000)
+        destino.consolidar()
+        A = destino.csr(len(df))
+    esperado = matriz_adjacencia(len(df), *arestas_similaridade(df))
+    assert A.nnz == esperado.nnz > 0
+    assert abs(A - esperado).max() == 0
+
+
+def test_subgrafo_b_em_disco_igual_ao_networkx(tmp_path):
+    df = _crimes_area(600)
+    coords = df.groupby('Rpt Dist No')[['LAT', 'LON']].mean()
+    GA = subgrafos.montar_subgrafo_a(df)
+    GB, _ = subgrafos.montar_subgrafo_b(df, coords, GA)
+    nos = list(GB.nodes)
+
+    with ArestasEmDisco(tmp_path, nao_direcionado=False, baldes=4) as destino:
+        subgrafos.emitir_transicoes(destino, subgrafos.contar_transicoes(df, coords), GA, nos, tamanho_lote=50)
+        destino.consolidar()
+        B = destino.csr(len(nos))
+    esperado = nx.to_scipy_sparse_array(GB, nodelist=nos, format='csr')
+    assert B.nnz == esperado.nnz > 0
+    assert abs(B - esperado).max() == 0
+
+    rota, custo = subgrafos.encontrar_rota_csr(B, nos)
+    rota_ref, custo_ref = subgrafos.encontrar_rota(GB)
+    assert rota and rota == rota_ref
+    assert custo == pytest.approx(custo_ref)
@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from cache_colunar import garantir_cache
+
+
+def _ler(caminho):
+    return pd.read_csv(caminho)
+
+
+def test_arquivos_de_mesmo_nome_nao_se_descartam(tmp_path):
+    for pasta in ('a', 'b'):
+        (tmp_path / pasta).mkdir()
+        (tmp_path / pasta / 'crimes.csv').write_text('x\n1\n')
+    cache = tmp_path / 'cache'
+
+    primeiro = garantir_cache(tmp_path / 'a' / 'crimes.csv', _ler, diretorio=cache)
+    segundo = garantir_cache(tmp_path / 'b' / 'crimes.csv', _ler, diretorio=cache)
+    assert primeiro != segundo
+    assert primeiro.exists() and segundo.exists()
+
+
+def test_parametros_novos_refazem_o_cache(tmp_path):
+    origem = tmp_path / 'crimes.csv'
+    origem.write_text('x\n1\n')
+    cache = tmp_path / 'cache'
+
+    antigo = garantir_cache(origem, _ler, {'limites': [1, 2]}, diretorio=cache)
+    assert garantir_cache(origem, _ler, {'limites': [1, 2]}, diretorio=cache) == antigo
+    novo = garantir_cache(origem, _ler, {'limites': [1, 3]}, diretorio=cache)
+    assert novo != antigo and not antigo.exists()
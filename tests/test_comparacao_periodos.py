@@ -0,0 +1,22 @@
+import numpy as np
+from scipy import sparse
+
+from comparacao_periodos import _mais_parecida, parear_comunidades
+
+
+def test_pareamento_por_componente():
+    # Componentes {0, 1} x {0, 1} e {2} x {3}; coluna 2 sem relação (surgimento)
+    S = sparse.csr_matrix(np.array([
+        [0.9, 0.8, 0.0, 0.0],
+        [0.85, 0.0, 0.0, 0.0],
+        [0.0, 0.0, 0.0, 0.7],
+        [0.0, 0.0, 0.0, 0.0],
+    ]))
+    linhas, colunas = parear_comunidades(S)
+    assert sorted(zip(linhas, colunas)) == [(0, 1), (1, 0), (2, 3)]
+    assert _mais_parecida(S).tolist() == [0, 0, 3, -1]
+    assert _mais_parecida(S.T.tocsr()).tolist() == [0, 0, -1, 2]
+
+
+def test_pareamento_sem_relacoes():
+    assert parear_comunidades(sparse.csr_matrix((3, 2))) == ([], [])
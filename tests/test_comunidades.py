@@ -0,0 +1,27 @@
+import networkx as nx
+import numpy as np
+
+from Comunidades import _escala_sem_sobreposicao, layout_comunidades
+
+
+def test_escala_igual_a_todos_os_pares():
+    rng = np.random.default_rng(0)
+    for c in (2, 3, 50, 400):
+        centros = rng.normal(size=(c, 2))
+        raio = np.sqrt(rng.integers(1, 1000, c))
+        raio = raio / raio.max()
+        a, b = np.triu_indices(c, 1)
+        esperado = (np.linalg.norm(centros[a] - centros[b], axis=1) / (raio[a] + raio[b])).min()
+        assert np.isclose(_escala_sem_sobreposicao(centros, raio), esperado)
+
+
+def test_layout_refeito_quando_o_grafo_muda(tmp_path):
+    G = nx.karate_club_graph()
+    nx.set_edge_attributes(G, 1.0, 'weight')
+    particao = {n: n % 3 for n in G}
+    antes = layout_comunidades(G, particao, tmp_path)
+    assert layout_comunidades(G, particao, tmp_path) is antes
+
+    G.remove_edge(0, 1)
+    assert layout_comunidades(G, particao, tmp_path) is not antes
+    assert len(list(tmp_path.glob('layout-*.npy'))) == 2
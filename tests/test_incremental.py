@@ -0,0 +1,29 @@
+import pandas as pd
+
+import subgrafos
+from incremental import anexar_historico, atualizar_transicoes
+
+from test_subgrafos import _crimes
+
+
+def test_transicoes_de_um_mes_novo():
+    # As datas novas não têm crimes anteriores: a recontagem sem os novos fica vazia
+    coords = pd.DataFrame({'LAT': [34.0, 34.01], 'LON': [-118.3, -118.31]}, index=[101, 102])
+    historico = subgrafos.codificar(_crimes([
+        ['ROBBERY', '2020-01-01 08:00', 101, 'Manhã', 34.0, -118.3],
+        ['BURGLARY', '2020-01-01 14:00', 102, 'Tarde', 34.01, -118.31],
+    ]))
+    novos = subgrafos.codificar(_crimes([
+        ['ROBBERY', '2020-02-01 08:00', 101, 'Manhã', 34.0, -118.3],
+        ['BURGLARY', '2020-02-01 14:00', 102, 'Tarde', 34.01, -118.31],
+        ['ROBBERY', '2020-02-01 15:00', 101, 'Tarde', 34.0, -118.3],
+    ]))
+
+    assert subgrafos.contar_transicoes(historico.iloc[:0], coords)['n'].dtype == 'int64'
+    transicoes = atualizar_transicoes(subgrafos.contar_transicoes(historico, coords), historico, novos, coords)
+    assert transicoes['n'].dtype == 'int64'
+
+    chaves = ['turno1', 'sub1', 'sub2', 'crime1', 'crime2']
+    completo = subgrafos.contar_transicoes(anexar_historico(historico, novos), coords)
+    pd.testing.assert_frame_equal(transicoes.sort_values(chaves, ignore_index=True),
+                                  completo.sort_values(chaves, ignore_index=True), check_dtype=False)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from louvain_esparso import best_partition_csr, matriz_adjacencia, modularidade_csr
+
+
+def _cliques(quantidade=4, tamanho=6):
+    """Cliques disjuntos ligados em anel por uma aresta fraca; nós 'c<clique>-<posição>'"""
+    i, j, w = [], [], []
+    for c in range(quantidade):
+        base = c * tamanho
+        for a in range(tamanho):
+            for b in range(a + 1, tamanho):
+                i.append(base + a)
+                j.append(base + b)
+                w.append(3.0)
+        i.append(base)
+        j.append(((c + 1) % quantidade) * tamanho + 1)
+        w.append(1.0)
+    n = quantidade * tamanho
+    nos = [f"c{k // tamanho}-{k % tamanho}" for k in range(n)]
+    return matriz_adjacencia(n, np.array(i), np.array(j), np.array(w)), nos
+
+
+def _grupos(particao, nos):
+    return {frozenset(no for no in nos if particao[no] == c) for c in set(particao.values())}
+
+
+def _esperado(nos, tamanho=6):
+    return {frozenset(nos[k:k + tamanho]) for k in range(0, len(nos), tamanho)}
+
+
+@pytest.mark.parametrize('metodo', ['louvain', 'leiden'])
+def test_particao_recupera_cliques(metodo):
+    if metodo == 'leiden':
+        pytest.importorskip('leidenalg')
+    A, nos = _cliques()
+    particao = best_partition_csr(A, nos, metodo, random_state=1)
+    assert _grupos(particao, nos) == _esperado(nos)
+
+
+@pytest.mark.parametrize('metodo', ['louvain', 'leiden'])
+def test_partida_a_quente_com_nos_novos(metodo):
+    if metodo == 'leiden':
+        pytest.importorskip('leidenalg')
+    A, nos = _cliques()
+    # Partição anterior com rótulos não contíguos e sem os dois últimos nós de cada clique
+    anterior = {no: 10 * int(no[1]) + 7 for no in nos if int(no.split('-')[1]) < 4}
+    particao = best_partition_csr(A, nos, metodo, random_state=1, particao=anterior)
+
+    assert set(particao) == set(nos)
+    assert _grupos(particao, nos) == _esperado(nos)
+    rotulos = [particao[no] for no in nos]
+    assert modularidade_csr(A, rotulos) > 0.6
@@ -0,0 +1,58 @@
+import networkx as nx
+import pytest
+
+from incremental import atualizar_subgrafo_b
+from rotas import ServicoRotas
+from subgrafos import contar_transicoes, montar_subgrafo_a, montar_subgrafo_b
+
+from test_subgrafos import _crimes
+
+
+def _subgrafo_b():
+    G = nx.DiGraph()
+    G.add_edge('101|Manhã', '101|Tarde', weight=1)
+    G.add_edge('101|Tarde', '102|Noite', weight=1)
+    G.add_edge('101|Manhã', '102|Tarde', weight=4)
+    G.add_edge('102|Tarde', '102|Noite', weight=4)
+    return G
+
+
+def test_consultas_reusam_as_arvores():
+    servico = ServicoRotas(_subgrafo_b())
+    assert servico.melhor_rota() == (['101|Manhã', '102|Tarde', '102|Noite'], 0.5)
+    servico.melhores_rotas(2)
+    servico.rota_entre('101', '102')
+    assert servico.calculos == 1
+
+
+def test_invalidar_refaz_as_arvores():
+    G = _subgrafo_b()
+    servico = ServicoRotas(G)
+    servico.melhor_rota()
+
+    G['101|Manhã']['101|Tarde']['weight'] = 10
+    G['101|Tarde']['102|Noite']['weight'] = 10
+    assert servico.calculos == 1 and not servico.atualizar()  # Sem invalidar, o cache continua
+    servico.invalidar()
+    assert servico.melhor_rota() == (['101|Manhã', '101|Tarde', '102|Noite'], pytest.approx(0.2))
+    assert servico.calculos == 2
+
+    assert servico.atualizar(_subgrafo_b())  # Grafo novo, mesma versão: refaz mesmo assim
+
+
+def test_atualizar_subgrafo_b_invalida_o_servico():
+    df = _crimes([
+        ['ROBBERY', '2020-01-01 08:00', 101, 'Manhã', 34.0, -118.3],
+        ['BURGLARY', '2020-01-01 14:00', 102, 'Tarde', 34.01, -118.31],
+        ['ROBBERY', '2020-01-01 20:00', 101, 'Noite', 34.0, -118.3],
+    ])
+    coords = df.groupby('Rpt Dist No')[['LAT', 'LON']].mean()
+    GA = montar_subgrafo_a(df)
+    GB, _ = montar_subgrafo_b(df.iloc[:2], coords, GA)
+    servico = ServicoRotas(GB)
+    assert servico.melhor_rota() == (None, float('inf'))
+
+    atualizar_subgrafo_b(GB, contar_transicoes(df, coords), GA)
+    rota, _ = servico.melhor_rota()
+    assert rota == ['101|Manhã', '102|Tarde', '101|Noite']
+    assert servico.calculos == 2
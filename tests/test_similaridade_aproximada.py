@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from Comunidades import preparar_dados
+from similaridade_aproximada import arestas_similaridade_aproximada, avaliar_recall, limitar_grau
+
+
+def _crimes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return preparar_dados(pd.DataFrame({
+        'DR_NO': np.arange(n) + 100000,
+        'Crm Cd Desc': rng.choice(['VEHICLE - STOLEN', 'BURGLARY', 'ROBBERY'], n, p=[.6, .3, .1]),
+        'AREA NAME': rng.choice(['Central', 'Pacific'], n),
+        'Weapon Desc': rng.choice(['missing', 'HAND', 'GUN'], n),
+        'Vict Sex': rng.choice(['M', 'F', 'missing'], n),
+        'Vict Descent': rng.choice(['H', 'W', 'B'], n),
+        'Premis Desc': rng.choice(['STREET', 'PARKING LOT'], n),
+        'LAT': rng.uniform(33.9, 34.2, n),
+        'LON': rng.uniform(-118.5, -118.2, n),
+    }))
+
+
+def test_limitar_grau_respeita_k():
+    # Estrela com centro 0 e pesos crescentes, mais arestas entre as folhas
+    i = np.array([0] * 6 + [1, 2, 3])
+    j = np.array([1, 2, 3, 4, 5, 6, 2, 3, 4])
+    w = np.array([3, 4, 5, 6, 7, 8, 9, 9, 9])
+    a, b, _ = limitar_grau(i, j, w, 2, random_state=0)
+    assert np.bincount(np.concatenate([a, b])).max() <= 2
+    assert (0, 6) in set(zip(a.tolist(), b.tolist()))  # A aresta mais forte do centro fica
+
+
+def test_grau_maximo_do_grafo_aproximado():
+    df = _crimes(1500)
+    i, j, _ = arestas_similaridade_aproximada(df, k=10)
+    grau = np.bincount(np.concatenate([i, j]), minlength=len(df))
+    assert len(i) and grau.max() <= 10
+
+    relatorio = avaliar_recall(df, amostra=1500, k=10)
+    assert relatorio['grau_maximo'] <= 10
+    assert relatorio['recall'] <= relatorio['recall_top_k'] <= 1
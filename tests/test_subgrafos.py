@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+
+import subgrafos
+
+
+def _crimes(linhas):
+    df = pd.DataFrame(linhas, columns=['Crm Cd Desc', 'DATE OCC', 'Rpt Dist No', 'Turno', 'LAT', 'LON'])
+    df['DATE OCC'] = pd.to_datetime(df['DATE OCC'])
+    df['Turno'] = pd.Categorical(df['Turno'], categories=subgrafos.TURNOS)
+    return df
+
+
+def test_subgrafo_b_sem_crimes():
+    df = _crimes([])
+    coords = pd.DataFrame({'LAT': [34.0, 34.01], 'LON': [-118.3, -118.31]}, index=[101, 102])
+    GA = subgrafos.montar_subgrafo_a(df)
+
+    assert subgrafos.contar_transicoes(df, coords).empty
+    GB, pos = subgrafos.montar_subgrafo_b(df, coords, GA)
+    assert GB.number_of_nodes() == 2 * len(subgrafos.TURNOS)
+    assert GB.number_of_edges() == 0
+    assert subgrafos.encontrar_rota(GB) == (None, float('inf'))
+
+
+def test_subgrafo_b_sem_turnos_consecutivos():
+    df = _crimes([
+        ['ROBBERY', '2020-01-01', 101, 'Manhã', 34.0, -118.3],
+        ['BURGLARY', '2020-01-02', 102, 'Noite', 34.01, -118.31],
+    ])
+    coords = df.groupby('Rpt Dist No')[['LAT', 'LON']].mean()
+    GB, _ = subgrafos.montar_subgrafo_b(df, coords, subgrafos.montar_subgrafo_a(df))
+    assert GB.number_of_edges() == 0
+
+
+def test_subgrafo_b_igual_a_referencia():
+    df = _crimes([
+        ['ROBBERY', '2020-01-01 08:00', 101, 'Manhã', 34.0, -118.3],
+        ['BURGLARY', '2020-01-01 14:00', 102, 'Tarde', 34.01, -118.31],
+        ['ROBBERY', '2020-01-01 20:00', 101, 'Noite', 34.0, -118.3],
+        ['BURGLARY', '2020-01-02 09:00', 102, 'Manhã', 34.01, -118.31],
+        ['ROBBERY', '2020-01-02 15:00', 101, 'Tarde', 34.0, -118.3],
+    ])
+    coords = df.groupby('Rpt Dist No')[['LAT', 'LON']].mean()
+    GA = subgrafos.montar_subgrafo_a(df)
+    GB, _ = subgrafos.montar_subgrafo_b(df, coords, GA)
+    GB_ref, _ = subgrafos.montar_subgrafo_b_referencia(df, coords, GA)
+    assert dict(GB.edges) == dict(GB_ref.edges)
+
+
+def test_headless_exige_areas():
+    with pytest.raises(SystemExit):
+        subgrafos.ler_argumentos(['--headless'])
+    assert subgrafos.ler_argumentos(['--headless', '--areas', 'todas']).areas == ['todas']
+
+
+@pytest.mark.filterwarnings('error')
+def test_pares_janela_com_crimes_fora_da_lista():
+    df = subgrafos.codificar(_crimes([
+        ['ROBBERY', '2020-01-01 08:00', 101, 'Manhã', 34.0, -118.3],
+        ['ARSON', '2020-01-01 09:00', 101, 'Manhã', 34.0, -118.3],
+        ['BURGLARY', '2020-01-01 10:00', 101, 'Manhã', 34.0, -118.3],
+    ]))
+    assert df['Crm Cd Desc'].dtype == 'category'
+    matriz = subgrafos.contar_pares_janela(df, ['BURGLARY', 'ROBBERY'])
+    assert matriz.tolist() == [[0, 0], [1, 0]]